@@ -0,0 +1,199 @@
+# build_assets.py
+"""
+Construit les fichiers statiques versionnés servis sous /assets.
+
+    python build_assets.py
+
+Pour chaque fichier de static/css, static/js et static/images:
+- minification des CSS et JS (rcssmin / rjsmin s'ils sont installés, sinon une
+  minification prudente: commentaires, indentation et lignes vides),
+- empreinte du contenu dans le nom (css/style.3f2a1b9c0d.css),
+- variantes .gz et .br (si le module brotli est installé) pour CSS et JS;
+  les images sont déjà compressées.
+Les url(...) relatives des CSS sont réécrites vers les images versionnées.
+Le manifest est écrit en dernier: l'application ne voit jamais un build partiel.
+Les fichiers des ASSETS_KEEP_BUILDS derniers builds restent en place et listés
+dans le manifest ("previous"): un serveur pas encore redémarré, ou une page
+en cache, peut encore demander les anciennes URLs versionnées.
+Les déclinaisons responsives des photos (utils/images.py) sont aussi générées
+si Pillow est installé.
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from utils.assets import ASSETS_DIR, ENCODINGS, MANIFEST_NAME
+from utils.images import IMAGE_CACHE_DIR, available_formats, generate_all
+
+# Dépendances optionnelles: sans elles, pas de variante .br et minification prudente
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+STATIC_DIR = "./static"
+# Builds dont les fichiers sont conservés, celui-ci compris
+ASSETS_KEEP_BUILDS = max(1, int(os.getenv("ASSETS_KEEP_BUILDS", "3")))
+# Les images d'abord: les CSS y font référence
+ASSET_FOLDERS = ("images", "css", "js")
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+}
+COMPRESSIBLE = (".css", ".js", ".svg")
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_SPACES = re.compile(r"\s*([{};,>])\s*")
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def minify_css(source: str) -> str:
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = CSS_COMMENT.sub("", source)
+    source = CSS_SPACES.sub(r"\1", source)
+    return re.sub(r"\s+", " ", source).replace(";}", "}").strip()
+
+
+def minify_js(source: str) -> str:
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    # Sans analyseur JS, on ne touche qu'aux lignes entières
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+def rewrite_css_urls(css: str, source_path: str, manifest: dict) -> str:
+    def _replace(match):
+        url = match.group(2).strip()
+        if url.startswith(("data:", "http:", "https:", "/", "#")):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source_path), url))
+        built = manifest.get(target)
+        return f'url("/assets/{built["file"]}")' if built else f'url("/static/{target}")'
+    return CSS_URL.sub(_replace, css)
+
+
+def hashed_name(path: str, body: bytes):
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{digest}{ext}", digest
+
+
+def _write_file(file_path: str, body: bytes):
+    # Écriture puis renommage: un fichier servi n'est jamais lu à moitié écrit
+    with open(file_path + ".tmp", "wb") as f:
+        f.write(body)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def write_asset(out_dir: str, name: str, body: bytes, compress: bool):
+    file_path = os.path.join(out_dir, name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    _write_file(file_path, body)
+    encodings = []
+    if compress:
+        _write_file(file_path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+        encodings.append("gzip")
+        if brotli is not None:
+            _write_file(file_path + ".br", brotli.compress(body, quality=11))
+            encodings.append("br")
+    return encodings
+
+
+def _built_files(entries: dict):
+    """Fichiers d'un build: {chemin versionné: entrée du manifest}."""
+    return {entry["file"]: entry for entry in entries.values()}
+
+
+def _read_previous_builds(out_dir: str):
+    """Builds précédents, du plus récent au plus ancien, d'après le manifest en place."""
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return [_built_files(manifest["assets"])] + manifest.get("previous", [])
+
+
+def prune(out_dir: str, dropped, kept):
+    """
+    Supprime les fichiers (et variantes) des builds sortis de la fenêtre,
+    sauf ceux qu'un build conservé partage (contenu inchangé, même nom).
+    """
+    kept_files = {name for build_files in kept for name in build_files}
+    removed = 0
+    for build_files in dropped:
+        for name, entry in build_files.items():
+            if name in kept_files:
+                continue
+            suffixes = [""] + [suffix for encoding, suffix in ENCODINGS if encoding in entry["encodings"]]
+            for suffix in suffixes:
+                try:
+                    os.remove(os.path.join(out_dir, name + suffix))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return removed
+
+
+def build(static_dir: str = STATIC_DIR, out_dir: str = ASSETS_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    previous = _read_previous_builds(out_dir)
+    manifest = {}
+    original_bytes = built_bytes = 0
+
+    for folder in ASSET_FOLDERS:
+        for root, _, names in os.walk(os.path.join(static_dir, folder)):
+            for name in sorted(names):
+                source_file = os.path.join(root, name)
+                source_path = os.path.relpath(source_file, static_dir).replace(os.sep, "/")
+                ext = posixpath.splitext(name)[1].lower()
+                if ext not in MEDIA_TYPES:
+                    continue
+                with open(source_file, "rb") as f:
+                    body = f.read()
+                original_bytes += len(body)
+                if ext == ".css":
+                    css = minify_css(body.decode("utf-8"))
+                    body = rewrite_css_urls(css, source_path, manifest).encode("utf-8")
+                elif ext == ".js":
+                    body = minify_js(body.decode("utf-8")).encode("utf-8")
+                built, digest = hashed_name(source_path, body)
+                manifest[source_path] = {
+                    "file": built,
+                    "hash": digest,
+                    "media_type": MEDIA_TYPES[ext],
+                    "encodings": write_asset(out_dir, built, body, ext in COMPRESSIBLE),
+                }
+                built_bytes += len(body)
+
+    kept, dropped = previous[:ASSETS_KEEP_BUILDS - 1], previous[ASSETS_KEEP_BUILDS - 1:]
+    content = {"assets": manifest, "previous": kept}
+    _write_file(os.path.join(out_dir, MANIFEST_NAME), json.dumps(content, ensure_ascii=False, indent=2).encode("utf-8"))
+    # Après le manifest: plus aucun serveur rechargé ne référence ces fichiers
+    removed = prune(out_dir, dropped, [_built_files(manifest)] + kept)
+    print(f"{len(manifest)} fichiers, {original_bytes} -> {built_bytes} octets (avant compression), dans {out_dir}; "
+          f"{len(kept)} build(s) précédent(s) conservé(s), {removed} fichier(s) supprimé(s)")
+
+
+if __name__ == "__main__":
+    build()
+    if available_formats():
+        print(f"{generate_all()} déclinaisons d'images générées dans {IMAGE_CACHE_DIR}")
@@ -0,0 +1,107 @@
+# build_static.py
+"""
+Pré-rend le catalogue public dans un répertoire statique.
+
+    python build_static.py --out ./dist
+
+Rend via l'application (main.app) les pages publiques non personnalisées
+(accueil, listes, pages de détail, pages de paiement) et les réponses JSON
+de /api/destinations et /api/packages, avec leurs variantes gzip et brotli
+(si le module brotli est installé). L'export est écrit dans un répertoire
+temporaire, qui ne remplace l'ancien qu'une fois complet.
+Pour le servir: STATIC_EXPORT_DIR=./dist (voir utils/static_export.py).
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+# L'application ne doit pas servir un ancien export pendant qu'on le reconstruit
+os.environ.pop("STATIC_EXPORT_DIR", None)
+
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal
+from models.destination import Destination
+from models.package import Package
+from utils.catalog_version import get_catalog_fingerprint
+from utils.static_export import MANIFEST_NAME, brotli, content_hash, output_file
+
+
+def public_paths(db):
+    destination_ids = [row[0] for row in db.query(Destination.id).order_by(Destination.id)]
+    package_ids = [row[0] for row in db.query(Package.id).order_by(Package.id)]
+    paths = ["/", "/destinations", "/packages", "/auth", "/api/destinations/", "/api/packages/"]
+    for destination_id in destination_ids:
+        paths += [f"/destination/{destination_id}", f"/api/destinations/{destination_id}"]
+    for package_id in package_ids:
+        paths += [f"/package/{package_id}", f"/checkout/{package_id}", f"/api/packages/{package_id}"]
+    return paths
+
+
+def write_variants(file_path: str, body: bytes):
+    encodings = []
+    with open(file_path, "wb") as f:
+        f.write(body)
+    with open(file_path + ".gz", "wb") as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    encodings.append("gzip")
+    if brotli is not None:
+        with open(file_path + ".br", "wb") as f:
+            f.write(brotli.compress(body, quality=11))
+        encodings.append("br")
+    return encodings
+
+
+def build(out_dir: str):
+    tmp_dir = out_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    client = TestClient(main.app)
+    db = SessionLocal()
+    try:
+        paths = public_paths(db)
+    finally:
+        db.close()
+
+    files = {}
+    for path in paths:
+        # Un fichier par chemin: une URL filtrée écraserait la page non filtrée
+        if "?" in path or "#" in path:
+            raise ValueError(f"URL avec query string dans l'export: {path}")
+        response = client.get(path, headers={"Accept-Encoding": "identity"})
+        if response.status_code != 200:
+            print(f"Ignoré: {path} ({response.status_code})")
+            continue
+        media_type = response.headers.get("content-type", "text/html; charset=utf-8")
+        relative = output_file(path, media_type)
+        file_path = os.path.join(tmp_dir, relative)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        files[path] = {
+            "file": relative,
+            "hash": content_hash(response.content),
+            "media_type": media_type,
+            "encodings": write_variants(file_path, response.content),
+        }
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "catalog": get_catalog_fingerprint(),
+        "files": files,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    print(f"{len(files)} fichiers exportés dans {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export statique du catalogue public")
+    parser.add_argument("--out", default="./dist", help="Répertoire de sortie")
+    build(parser.parse_args().out)
@@ -3,20 +3,33 @@
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import distinct
+from sqlalchemy.ext.asyncio import AsyncSession
 import uvicorn
 import json
+import os
+import time
 
 from fastapi.middleware.cors import CORSMiddleware
-from database import SessionLocal, get_db, engine
+from database import SessionLocal, get_db, get_async_db, engine, async_engine, async_read_engine, create_missing_columns, create_missing_indexes
 import middleware
 from models.destination import Destination, initialize_destinations
-from models.package import Package, initialize_packages
-from models.user import User
-from models.favorite import Favorite
+from models.package import Package, initialize_packages, promoted_order, sync_effective_prices
+from models.user import User, get_optional_user
+from models.favorite import Favorite, get_cached_favorite_ids, cache_favorite_ids, load_favorite_destinations
 from routes import destinations, packages, auth, favorites
+from utils import search_index, geo_index, facets, catalog_snapshot
+from utils.catalog_version import watch_catalog_models, seed_catalog_version, start_catalog_version_poll, stop_catalog_version_poll
+from utils import metrics
+from utils.auth_utils import get_password_hash_metrics
+from utils.response_cache import response_cache, make_key
+from utils.page_cache import page_cache, store_page, page_response
+from utils.static_export import static_export_middleware, load_static_export
+from utils.assets import asset_url, asset_response
+from utils.favorite_writer import favorite_writer
+from utils.images import responsive_image, image_srcset, image_response
+from utils.conditional import catalog_validators, row_validators, is_not_modified, not_modified_response
 from datetime import datetime, timedelta
 
 # Création des tables
@@ -24,6 +37,13 @@ User.metadata.create_all(bind=engine)
 Destination.metadata.create_all(bind=engine)
 Package.metadata.create_all(bind=engine)
 Favorite.metadata.create_all(bind=engine)
+create_missing_columns(engine)
+create_missing_indexes(engine)
+sync_effective_prices(engine)
+search_index.ensure_search_index(engine)
+geo_index.ensure_geo_index(engine)
+# Toute modification du catalogue invalide les caches (utils/catalog_version.py)
+watch_catalog_models(Destination, Package)
 
 app = FastAPI(title="GO unamur", version="2.0.0")
 origins = [
@@ -43,28 +63,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 templates = Jinja2Templates(directory="templates")
+# Helper des fichiers statiques versionnés (build_assets.py)
+templates.env.globals["asset_url"] = asset_url
+# Déclinaisons responsives des photos (utils/images.py)
+templates.env.globals["responsive_image"] = responsive_image
+templates.env.globals["image_srcset"] = image_srcset
+metrics.instrument_templates(templates)
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine, "async")
+metrics.instrument_engine(async_read_engine, "async_read")
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Export statique (STATIC_EXPORT_DIR): déclaré avant auth_middleware pour rester journalisé
+app.middleware("http")(static_export_middleware)
 app.middleware("http")(middleware.auth_middleware)
 
 
 # ==================== ROUTES HTML PRINCIPALES ====================
+# Les routes qui utilisent la session synchrone (get_db) sont déclarées en
+# `def`: FastAPI les exécute dans son pool de threads au lieu de bloquer la
+# boucle d'événements pendant les requêtes SQLite.
 
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
+def render_template(name: str, context: dict) -> str:
+    """
+    Rendu Jinja sans objet Request (les templates n'en dépendent pas), pour
+    les pages mises en cache et le préchauffage au démarrage.
+    """
+    start = time.perf_counter()
+    try:
+        return templates.get_template(name).render(context)
+    finally:
+        metrics.template_render_seconds.observe(time.perf_counter() - start, name)
+
+def cached_page_response(request: Request, entry):
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return not_modified_response(entry.etag, entry.last_modified)
+    return page_response(request, entry)
+
+def render_home(db: Session, key):
     popular_destinations_obj = db.query(Destination).limit(4).all()
-    featured_packages_obj = db.query(Package).limit(2).all()
-    destinations_for_js = [{"name": d.name, "lat": d.coordinates.get('lat',0), "lng": d.coordinates.get('lng',0)} for d in popular_destinations_obj]
-    destinations_json_string = json.dumps(destinations_for_js)
-    return templates.TemplateResponse("index.html", {
-        "request": request, "popular_destinations": popular_destinations_obj,
-        "featured_packages": featured_packages_obj, "destinations_json_for_map": destinations_json_string,
+    featured_packages_obj = db.query(Package).order_by(*promoted_order()).limit(2).all()
+    html = render_template("index.html", {
+        "popular_destinations": popular_destinations_obj,
+        "featured_packages": featured_packages_obj,
         "page_title": "GO - Explorez le monde"
     })
+    return store_page(key, html, *catalog_validators(key))
+
+@app.get("/", response_class=HTMLResponse)
+def home(request: Request, db: Session = Depends(get_db)):
+    key = make_key("index.html")
+    entry = page_cache.get(key) or render_home(db, key)
+    return cached_page_response(request, entry)
 
 # Dans main.py, remplacez la fonction destinations_page
 
 @app.get("/destinations", response_class=HTMLResponse)
-async def destinations_page(
+def destinations_page(
     request: Request,
     db: Session = Depends(get_db),
     continent: str = None,
@@ -74,6 +128,16 @@ async def destinations_page(
 ):
     """Page des destinations AVEC filtres fonctionnels"""
     
+    # 304 si la page a déjà été vue pour ces filtres et cet état du catalogue
+    etag, last_modified = catalog_validators(("destinations_page", continent, price_category, min_rating, search))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    key = make_key("destinations.html", continent=continent, price_category=price_category, min_rating=min_rating, search=search)
+    entry = page_cache.get(key)
+    if entry is not None:
+        return page_response(request, entry)
+
     query = db.query(Destination)
     
     # Appliquer les filtres s'ils sont présents dans l'URL
@@ -84,7 +148,7 @@ async def destinations_page(
     if min_rating:
         query = query.filter(Destination.rating >= min_rating)
     if search:
-        query = query.filter(Destination.name.contains(search))
+        query = search_index.apply_search(query, Destination, search)
         
     destinations_obj = query.all()
     
@@ -94,8 +158,18 @@ async def destinations_page(
         for d in destinations_obj
     ]
     
-    # Obtenir la liste de tous les continents pour le menu déroulant du filtre
-    continents_data = [c[0] for c in db.query(distinct(Destination.continent)).order_by(Destination.continent).all() if c[0]]
+    # Continents et comptes des menus déroulants, calculés en mémoire (utils/facets.py)
+    facet_index = facets.get_facet_index()
+    base = None
+    if search:
+        base = facet_index.ids_bitmap(
+            row[0] for row in search_index.apply_search(db.query(Destination.id), Destination, search)
+        )
+    facet_counts = facet_index.counts(
+        base, continent=[continent] if continent else None,
+        price_category=[price_category] if price_category else None, min_rating=min_rating
+    )["facets"]
+    continents_data = list(facet_counts["continent"])
 
     # Passer les filtres actuels au template pour qu'il puisse les afficher
     current_filters = {
@@ -105,29 +179,38 @@ async def destinations_page(
         "search": search
     }
 
-    return templates.TemplateResponse("destinations.html", {
-        "request": request, 
+    html = render_template("destinations.html", {
         "destinations": destinations_data,
         "all_continents": continents_data, # Renommé pour plus de clarté
+        "facet_counts": facet_counts,
         "current_filters": current_filters,
         "page_title": "Nos Destinations"
     })
+    return page_response(request, store_page(key, html, etag, last_modified))
 
 @app.get("/packages", response_class=HTMLResponse)
-async def packages_page(request: Request, db: Session = Depends(get_db)):
-    packages_obj = db.query(Package).all()
-    packages_data = [{"id": p.id, "name": p.name, "description": p.description, "duration": p.duration, "price": p.price, "image_url": p.image_url} for p in packages_obj]
-    return templates.TemplateResponse("packages.html", {
-        "request": request, "packages": packages_data, "page_title": "Nos Packages de Voyage"
-    })
+def packages_page(request: Request, db: Session = Depends(get_db)):
+    etag, last_modified = catalog_validators(("packages_page",))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    key = make_key("packages.html")
+    entry = page_cache.get(key)
+    if entry is not None:
+        return page_response(request, entry)
+
+    packages_obj = db.query(Package).order_by(*promoted_order()).all()
+    packages_data = [{"id": p.id, "name": p.name, "description": p.description, "duration": p.duration, "price": p.price, "effective_price": p.effective_price, "image_url": p.image_url} for p in packages_obj]
+    html = render_template("packages.html", {"packages": packages_data, "page_title": "Nos Packages de Voyage"})
+    return page_response(request, store_page(key, html, etag, last_modified))
 
 @app.get("/search", response_class=HTMLResponse)
-async def search_page(request: Request, db: Session = Depends(get_db), q: str = None):
+def search_page(request: Request, db: Session = Depends(get_db), q: str = None):
     destinations_results, packages_results = [], []
     if q:
-        dest_obj = db.query(Destination).filter(Destination.name.contains(q) | Destination.description.contains(q)).all()
+        dest_obj = search_index.apply_search(db.query(Destination), Destination, q).all()
         destinations_results = [{"id": d.id, "name": d.name, "country": d.country, "image_url": d.image_url} for d in dest_obj]
-        pkg_obj = db.query(Package).filter(Package.name.contains(q) | Package.description.contains(q)).all()
+        pkg_obj = search_index.apply_search(db.query(Package), Package, q).all()
         packages_results = [{"id": p.id, "name": p.name, "duration": p.duration, "image_url": p.image_url} for p in pkg_obj]
     
     return templates.TemplateResponse("search.html", {
@@ -141,33 +224,73 @@ async def auth_page(request: Request):
     return templates.TemplateResponse("auth.html", {"request": request, "page_title": "Connexion"})
 
 @app.get("/favorites", response_class=HTMLResponse)
-async def favorites_page(request: Request):
-    return templates.TemplateResponse("favorites.html", {"request": request, "user": None, "favorites": [], "page_title": "Mes Favoris"})
+async def favorites_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Favoris rendus côté serveur: utilisateur du cookie ou de l'en-tête
+    Authorization, puis une seule requête Favorite -> Destination.
+    """
+    current_user = await get_optional_user(request, db)
+    favorites_data = []
+    if current_user is not None:
+        # Le cache des ids évite la requête quand la liste est vide
+        cached_ids = get_cached_favorite_ids(current_user.id)
+        pending = favorite_writer.pending_for(current_user.id)
+        if cached_ids is None or cached_ids or pending:
+            destinations_obj = await load_favorite_destinations(db, current_user.id, pending)
+            favorites_data = [
+                {"id": d.id, "name": d.name, "country": d.country, "continent": d.continent,
+                 "description": d.description, "image_url": d.image_url, "rating": d.rating}
+                for d in destinations_obj
+            ]
+            # On ne met en cache que l'état de la base
+            if not pending:
+                cache_favorite_ids(current_user.id, [d["id"] for d in favorites_data])
+
+    response = templates.TemplateResponse("favorites.html", {
+        "request": request, "user": current_user, "favorites": favorites_data, "page_title": "Mes Favoris"
+    })
+    # Page personnalisée: jamais dans un cache partagé
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Cookie, Authorization"
+    return response
 
 
 # ==================== ROUTES HTML DE DÉTAIL ET RÉSERVATION ====================
 
-@app.get("/destination/{destination_id}", response_class=HTMLResponse)
-async def destination_detail(request: Request, destination_id: int, db: Session = Depends(get_db)):
-    dest_obj = db.query(Destination).filter(Destination.id == destination_id).first()
-    if not dest_obj: raise HTTPException(status_code=404, detail="Destination non trouvée")
-    
+def render_destination_page(dest_obj: Destination):
     map_data_json = json.dumps({"name": dest_obj.name, "lat": dest_obj.coordinates.get('lat',0), "lng": dest_obj.coordinates.get('lng',0)})
-    
-    return templates.TemplateResponse("destination-detail.html", {
-        "request": request, "destination": dest_obj, "map_data_json": map_data_json, "page_title": dest_obj.name
+    html = render_template("destination-detail.html", {
+        "destination": dest_obj, "map_data_json": map_data_json, "page_title": dest_obj.name
     })
+    key = make_key("destination-detail.html", id=dest_obj.id)
+    return store_page(key, html, *row_validators("destination-page", dest_obj))
+
+def render_package_page(pkg_obj: Package):
+    html = render_template("package-detail.html", {"package": pkg_obj, "page_title": pkg_obj.name})
+    key = make_key("package-detail.html", id=pkg_obj.id)
+    return store_page(key, html, *row_validators("package-page", pkg_obj))
+
+@app.get("/destination/{destination_id}", response_class=HTMLResponse)
+def destination_detail(request: Request, destination_id: int, db: Session = Depends(get_db)):
+    entry = page_cache.get(make_key("destination-detail.html", id=destination_id))
+    if entry is None:
+        dest_obj = db.query(Destination).filter(Destination.id == destination_id).first()
+        if not dest_obj: raise HTTPException(status_code=404, detail="Destination non trouvée")
+        entry = render_destination_page(dest_obj)
+    return cached_page_response(request, entry)
 
 @app.get("/package/{package_id}", response_class=HTMLResponse)
-async def package_detail(request: Request, package_id: int, db: Session = Depends(get_db)):
-    pkg_obj = db.query(Package).filter(Package.id == package_id).first()
-    if not pkg_obj: raise HTTPException(status_code=404, detail="Package non trouvé")
-    
-    return templates.TemplateResponse("package-detail.html", {"request": request, "package": pkg_obj, "page_title": pkg_obj.name})
+def package_detail(request: Request, package_id: int, db: Session = Depends(get_db)):
+    entry = page_cache.get(make_key("package-detail.html", id=package_id))
+    if entry is None:
+        pkg_obj = db.query(Package).filter(Package.id == package_id).first()
+        if not pkg_obj: raise HTTPException(status_code=404, detail="Package non trouvé")
+        entry = render_package_page(pkg_obj)
+    return cached_page_response(request, entry)
 
 
 @app.get("/checkout/{package_id}", response_class=HTMLResponse)
-async def checkout_page(request: Request, package_id: int, db: Session = Depends(get_db)):
+def checkout_page(request: Request, package_id: int, db: Session = Depends(get_db)):
     """Page de paiement pour un package - Version complète"""
     
     package_obj = db.query(Package).filter(Package.id == package_id).first()
@@ -194,7 +317,7 @@ async def checkout_page(request: Request, package_id: int, db: Session = Depends
 
 
 @app.get("/destination/{destination_id}/booking", response_class=HTMLResponse)
-async def destination_booking_page(request: Request, destination_id: int, db: Session = Depends(get_db)):
+def destination_booking_page(request: Request, destination_id: int, db: Session = Depends(get_db)):
     """Page de réservation pour une destination - Version complète et corrigée"""
     
     dest_obj = db.query(Destination).filter(Destination.id == destination_id).first()
@@ -226,8 +349,84 @@ async def destination_booking_page(request: Request, destination_id: int, db: Se
     return templates.TemplateResponse("destination-booking.html", context)
 
 
+@app.get("/assets/{asset_path:path}", include_in_schema=False)
+async def assets(request: Request, asset_path: str):
+    return asset_response(request, asset_path)
+
+
+# Génération à la demande: route synchrone, l'encodage tourne dans le pool de threads
+@app.get("/img/{width}/{fmt}/{image_path:path}", include_in_schema=False)
+def responsive_images(request: Request, width: int, fmt: str, image_path: str):
+    return image_response(request, image_path, width, fmt)
+
+
 # ==================== ROUTES API ET INITIALISATION ====================
 
+@app.on_event("startup")
+async def start_favorite_writer():
+    favorite_writer.start()
+
+@app.on_event("startup")
+async def start_catalog_version():
+    # Écritures du catalogue faites par les autres workers (utils/catalog_version.py)
+    start_catalog_version_poll()
+
+@app.on_event("shutdown")
+async def flush_favorite_writer():
+    # Écrit les bascules de favoris encore en attente (FAVORITES_WRITE_BEHIND)
+    await favorite_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_catalog_version():
+    stop_catalog_version_poll()
+
+@metrics.register_collector
+def _application_stats():
+    """Statistiques du pool bcrypt, des caches de réponses et de pages, des favoris différés et de l'instantané"""
+    hash_stats = get_password_hash_metrics()
+    snapshot = catalog_snapshot.get_snapshot()
+    return [
+        "# TYPE password_hash_operations_total counter",
+        f"password_hash_operations_total {hash_stats['operations']}",
+        "# TYPE password_hash_rejected_total counter",
+        f"password_hash_rejected_total {hash_stats['rejected']}",
+        "# TYPE password_hash_wait_seconds_total counter",
+        f"password_hash_wait_seconds_total {hash_stats['wait_seconds_total']}",
+        "# TYPE password_hash_seconds_total counter",
+        f"password_hash_seconds_total {hash_stats['hash_seconds_total']}",
+        "# TYPE password_hash_pending gauge",
+        f"password_hash_pending {hash_stats['pending']}",
+        "# TYPE response_cache_hits_total counter",
+        f"response_cache_hits_total {response_cache.hits}",
+        "# TYPE response_cache_misses_total counter",
+        f"response_cache_misses_total {response_cache.misses}",
+        "# TYPE response_cache_bytes gauge",
+        f"response_cache_bytes {response_cache.size}",
+        "# TYPE page_cache_hits_total counter",
+        f"page_cache_hits_total {page_cache.hits}",
+        "# TYPE page_cache_misses_total counter",
+        f"page_cache_misses_total {page_cache.misses}",
+        "# TYPE page_cache_bytes gauge",
+        f"page_cache_bytes {page_cache.size}",
+        "# TYPE favorites_write_behind_pending gauge",
+        f"favorites_write_behind_pending {favorite_writer.pending_count}",
+        "# TYPE favorites_write_behind_flushes_total counter",
+        f"favorites_write_behind_flushes_total {favorite_writer.flushes}",
+        "# TYPE favorites_write_behind_operations_total counter",
+        f"favorites_write_behind_operations_total {favorite_writer.operations_written}",
+        "# TYPE favorites_write_behind_coalesced_total counter",
+        f"favorites_write_behind_coalesced_total {favorite_writer.operations_coalesced}",
+        "# TYPE catalog_snapshot_ready gauge",
+        f"catalog_snapshot_ready {int(snapshot is not None)}",
+        "# TYPE catalog_snapshot_build_seconds gauge",
+        f"catalog_snapshot_build_seconds {snapshot.build_seconds if snapshot else 0}",
+    ]
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(auth.router, prefix="/api")
 app.include_router(destinations.router, prefix="/api")
 app.include_router(packages.router, prefix="/api")
@@ -242,10 +441,36 @@ def init_db():
         if db.query(Package).count() == 0:
             print("Initialisation des packages...")
             initialize_packages(db)
+        # Version partagée du catalogue, base des ETags (utils/conditional.py)
+        seed_catalog_version(db, Destination, Package)
         print("Base de données initialisée.")
     finally:
         db.close()
 init_db()
 
+# Export statique (STATIC_EXPORT_DIR), vérifié contre l'empreinte calculée par init_db()
+load_static_export()
+
+# Instantané en colonnes du catalogue pour les listes de l'API (utils/catalog_snapshot.py)
+if catalog_snapshot.is_enabled():
+    catalog_snapshot.load_catalog_snapshot()
+
+def warm_page_cache():
+    """
+    Pré-rend l'accueil et toutes les pages de détail (une requête par table).
+    """
+    db = SessionLocal()
+    try:
+        render_home(db, make_key("index.html"))
+        for dest_obj in db.query(Destination).all():
+            render_destination_page(dest_obj)
+        for pkg_obj in db.query(Package).all():
+            render_package_page(pkg_obj)
+    finally:
+        db.close()
+
+if os.getenv("PAGE_CACHE_WARM", "1") == "1":
+    warm_page_cache()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -2,15 +2,83 @@ from fastapi import Request, Response
 import time
 import json
 import logging
+import logging.handlers
+import atexit
+import queue
+import random
+from datetime import datetime, timezone
 from typing import Callable
 import os
 
-# Configurer le logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("travel_api")
+from utils import metrics
+
+# ==================== LOGGING ASYNCHRONE ====================
+# Les routes ne font que déposer l'enregistrement dans une file; le formatage
+# JSON et l'écriture disque se font dans le thread du QueueListener.
+
+LOG_DIR = "./logs"
+LOG_FILE = os.path.join(LOG_DIR, "travel_api.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Proportion des réponses réussies (< 400) journalisées; erreurs et requêtes lentes: toujours
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "500"))
 
 # Créer le répertoire des logs s'il n'existe pas
-os.makedirs("./logs", exist_ok=True)
+os.makedirs(LOG_DIR, exist_ok=True)
+
+class JsonLineFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement; les champs structurés viennent de extra={"fields": ...}"""
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """File bornée: si le thread d'écriture ne suit plus, on perd des logs plutôt que de bloquer."""
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+def setup_logging():
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonLineFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    console_handler.setFormatter(JsonLineFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Vider la file à l'arrêt du processus
+    atexit.register(listener.stop)
+
+    api_logger = logging.getLogger("travel_api")
+    api_logger.setLevel(logging.INFO)
+    api_logger.addHandler(DroppingQueueHandler(log_queue))
+    api_logger.propagate = False
+    return api_logger, listener
+
+logger, log_listener = setup_logging()
+
+def _should_log(status_code: int, duration_ms: float) -> bool:
+    if status_code >= 400 or duration_ms >= LOG_SLOW_REQUEST_MS:
+        return True
+    return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
 
 # Middleware d'authentification et de logging
 async def auth_middleware(request: Request, call_next: Callable) -> Response:
@@ -28,8 +96,7 @@ async def auth_middleware(request: Request, call_next: Callable) -> Response:
     request_path = request.url.path
     
     # Enregistrer le début de la requête
-    start_time = time.time()
-    logger.info(f"Requête reçue - Méthode: {request.method}, Chemin: {request_path}, Client: {client_host}")
+    start_ns = time.perf_counter_ns()
     
     # Vérifier l'authentification pour les routes protégées
     auth_required_routes = []
@@ -38,7 +105,9 @@ async def auth_middleware(request: Request, call_next: Callable) -> Response:
     # Si la route nécessite une authentification et qu'aucun token n'est fourni
     if any(request_path.startswith(route) for route in auth_required_routes) and (not token or not token.startswith("Bearer ")):
         # Enregistrer la tentative d'accès non autorisée
-        logger.warning(f"Tentative d'accès non autorisé - Méthode: {request.method}, Chemin: {request_path}, Client: {client_host}")
+        logger.warning("Tentative d'accès non autorisé", extra={"fields": {
+            "method": request.method, "path": request_path, "client": client_host
+        }})
         
         # Renvoyer une réponse d'erreur
         return Response(
@@ -48,28 +117,53 @@ async def auth_middleware(request: Request, call_next: Callable) -> Response:
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    metrics.http_requests_in_flight.inc()
     try:
         # Traiter la requête
         response = await call_next(request)
         
         # Calculer le temps de réponse
-        process_time = time.time() - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        duration_ms = elapsed_ns / 1e6
+
+        # Métriques par modèle de route (résolu par le routeur pendant call_next)
+        route = metrics.route_label(request)
+        metrics.http_requests_total.inc(request.method, route, str(response.status_code))
+        metrics.http_request_duration_seconds.observe(elapsed_ns / 1e9, request.method, route)
+        if response.status_code >= 500:
+            metrics.http_request_errors_total.inc(request.method, route)
         
-        # Enregistrer la réponse
-        logger.info(f"Réponse envoyée - Statut: {response.status_code}, Temps: {process_time:.4f}s, Chemin: {request_path}")
+        # Enregistrer la réponse (échantillonnée si succès rapide)
+        if _should_log(response.status_code, duration_ms):
+            level = logging.WARNING if response.status_code >= 500 or duration_ms >= LOG_SLOW_REQUEST_MS else logging.INFO
+            logger.log(level, "Réponse envoyée", extra={"fields": {
+                "method": request.method, "path": request_path, "status": response.status_code,
+                "duration_ms": round(duration_ms, 3), "client": client_host
+            }})
         
         # Ajouter des en-têtes de performance
-        response.headers["X-Process-Time"] = str(process_time)
+        response.headers["X-Process-Time"] = str(elapsed_ns / 1e9)
         
         return response
         
     except Exception as e:
+        route = metrics.route_label(request)
+        metrics.http_requests_total.inc(request.method, route, "500")
+        metrics.http_request_errors_total.inc(request.method, route)
+        metrics.http_request_duration_seconds.observe((time.perf_counter_ns() - start_ns) / 1e9, request.method, route)
+
         # Enregistrer l'erreur
-        logger.error(f"Erreur lors du traitement - Chemin: {request_path}, Erreur: {str(e)}")
+        logger.error("Erreur lors du traitement", exc_info=True, extra={"fields": {
+            "method": request.method, "path": request_path, "client": client_host,
+            "duration_ms": round((time.perf_counter_ns() - start_ns) / 1e6, 3), "error": str(e)
+        }})
         
         # Renvoyer une réponse d'erreur
         return Response(
             content=json.dumps({"detail": "Une erreur est survenue lors du traitement de la requête"}),
             status_code=500,
             media_type="application/json"
-        )
\ No newline at end of file
+        )
+
+    finally:
+        metrics.http_requests_in_flight.dec()
\ No newline at end of file
@@ -1,6 +1,6 @@
 # models/destination.py - Version FINALE avec les chemins d'images corrigés
 
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, event
 from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -9,7 +9,7 @@ from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import Base
+from database import Base, JSONType
 
 # Modèle SQLAlchemy
 class Destination(Base):
@@ -22,12 +22,41 @@ class Destination(Base):
     image_url = Column(String)
     rating = Column(Float, default=0.0)
     price_category = Column(String)
-    coordinates = Column(JSON)
-    activities = Column(JSON)
-    weather_info = Column(JSON)
+    coordinates = Column(JSONType)
+    # Copie numérique et indexée de coordinates (voir sync_coordinates)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    activities = Column(JSONType)
+    weather_info = Column(JSONType)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Index composites (clé de tri, id) pour la pagination par curseur
+    __table_args__ = (
+        Index("ix_destinations_rating_id", "rating", "id"),
+        Index("ix_destinations_name_id", "name", "id"),
+        # Recherche par zone (utils/geo_index.py) hors SQLite/R*Tree
+        Index("ix_destinations_lat_lng", "latitude", "longitude"),
+        # PostgreSQL: index GIN sur les activités (filtres par containment @>)
+        Index("ix_destinations_activities_gin", "activities", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+def _coordinate(coordinates, key):
+    try:
+        return float(coordinates[key])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+@event.listens_for(Destination, "before_insert")
+@event.listens_for(Destination, "before_update")
+def sync_coordinates(mapper, connection, target):
+    """
+    Recopie coordinates {lat, lng} dans latitude/longitude à chaque écriture ORM.
+    Les écritures SQL brutes doivent renseigner les deux colonnes elles-mêmes.
+    """
+    target.latitude = _coordinate(target.coordinates, "lat")
+    target.longitude = _coordinate(target.coordinates, "lng")
+
 # Modèles Pydantic (inchangés)
 class CoordinatesModel(BaseModel):
     lat: float
@@ -48,6 +77,27 @@ class DestinationResponse(DestinationBase):
         from_attributes = True
         arbitrary_types_allowed = True
 
+class DestinationPage(BaseModel):
+    items: List[DestinationResponse]
+    next_cursor: Optional[str] = None
+    total_estimate: Optional[int] = None
+
+class DestinationNearby(DestinationResponse):
+    distance_km: float
+
+class DestinationFacets(BaseModel):
+    # Nombre de destinations pour les filtres, et comptes par valeur de chaque facette
+    total: int
+    facets: Dict[str, Dict[str, int]]
+
+class DestinationBatchRequest(BaseModel):
+    ids: List[int]
+
+class DestinationBatch(BaseModel):
+    # Destinations dans l'ordre demandé; `missing` liste les ids inexistants
+    items: List[DestinationResponse]
+    missing: List[int] = []
+
 # Fonction d'initialisation avec les BONS chemins d'images
 def initialize_destinations(db):
     if db.query(Destination).count() > 0:
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, event, select, delete, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List
@@ -7,6 +10,13 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import Base, SessionLocal
+from models.destination import Destination
+from utils.cache import TTLCache
+
+# Ids des destinations favorites de chaque utilisateur (tuple d'entiers, le plus
+# récent d'abord), invalidé à chaque écriture sur ses favoris
+FAVORITES_CACHE_TTL_SECONDS = float(os.getenv("FAVORITES_CACHE_TTL_SECONDS", "300"))
+FAVORITES_CACHE_MAXSIZE = int(os.getenv("FAVORITES_CACHE_MAXSIZE", "10000"))
 
 # Modèle SQLAlchemy pour la base de données
 class Favorite(Base):
@@ -22,6 +32,44 @@ class Favorite(Base):
         UniqueConstraint('user_id', 'destination_id', name='unique_user_destination'),
     )
 
+_favorite_ids_cache = TTLCache(maxsize=FAVORITES_CACHE_MAXSIZE, ttl=FAVORITES_CACHE_TTL_SECONDS)
+
+def get_cached_favorite_ids(user_id: int):
+    """Tuple des ids de destinations favorites, ou None si absent du cache"""
+    return _favorite_ids_cache.get(user_id)
+
+def cache_favorite_ids(user_id: int, destination_ids):
+    _favorite_ids_cache.set(user_id, tuple(destination_ids))
+
+def invalidate_favorite_ids(user_id: int):
+    _favorite_ids_cache.pop(user_id)
+
+# Invalidation au commit (comme utils/catalog_version.py): une lecture
+# concurrente ne peut pas remettre en cache l'état d'avant l'écriture
+@event.listens_for(Favorite, "after_insert")
+@event.listens_for(Favorite, "after_delete")
+def _mark_favorites_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_favorites_changed(session, target.user_id)
+
+def mark_favorites_changed(session, user_id: int):
+    """
+    À appeler après une écriture SQL directe (hors ORM) sur les favoris:
+    le cache de l'utilisateur sera invalidé au commit.
+    """
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault("favorite_users", set()).add(user_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("favorite_users", ()):
+        invalidate_favorite_ids(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("favorite_users", None)
+
 # Modèles Pydantic pour les requêtes et réponses API
 class FavoriteBase(BaseModel):
     destination_id: int
@@ -29,6 +77,19 @@ class FavoriteBase(BaseModel):
 class FavoriteCreate(FavoriteBase):
     pass
 
+# Ajout / suppression groupés: les suppressions sont appliquées avant les ajouts
+class FavoriteBulkRequest(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
+class FavoriteBulkResult(BaseModel):
+    destination_id: int
+    action: str  # "add" ou "remove"
+    status: str  # added, already_present, not_found, removed, not_in_favorites
+
+class FavoriteBulkResponse(BaseModel):
+    results: List[FavoriteBulkResult]
+
 class FavoriteResponse(FavoriteBase):
     id: int
     user_id: int
@@ -74,4 +135,80 @@ def remove_favorite(db, user_id: int, destination_id: int):
         db.commit()
         return True
     
-    return False
\ No newline at end of file
+    return False
+
+# ==================== ÉCRITURES GROUPÉES (ASYNC) ====================
+
+# Ids par instruction, sous la limite de paramètres de SQLite
+FAVORITES_CHUNK_SIZE = 500
+
+def _dialect_insert(db):
+    return postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+
+def _chunks(ids):
+    for start in range(0, len(ids), FAVORITES_CHUNK_SIZE):
+        yield ids[start:start + FAVORITES_CHUNK_SIZE]
+
+async def insert_favorites(db, user_id: int, destination_ids: List[int]) -> set:
+    """
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING: une instruction
+    insère les favoris dont la destination existe et qui ne sont pas déjà
+    présents (contrainte unique_user_destination), et renvoie les ids ajoutés.
+    """
+    added = set()
+    for chunk in _chunks(destination_ids):
+        source = select(literal(user_id), Destination.id).where(Destination.id.in_(chunk))
+        statement = (
+            _dialect_insert(db)(Favorite)
+            .from_select(["user_id", "destination_id"], source)
+            .on_conflict_do_nothing(index_elements=["user_id", "destination_id"])
+            .returning(Favorite.destination_id)
+        )
+        added.update((await db.execute(statement)).scalars())
+    mark_favorites_changed(db, user_id)
+    return added
+
+async def delete_favorites(db, user_id: int, destination_ids: List[int]) -> set:
+    removed = set()
+    for chunk in _chunks(destination_ids):
+        statement = (
+            delete(Favorite)
+            .where(Favorite.user_id == user_id, Favorite.destination_id.in_(chunk))
+            .returning(Favorite.destination_id)
+        )
+        removed.update((await db.execute(statement)).scalars())
+    mark_favorites_changed(db, user_id)
+    return removed
+
+async def existing_destination_ids(db, destination_ids: List[int]) -> set:
+    found = set()
+    for chunk in _chunks(destination_ids):
+        result = await db.execute(select(Destination.id).where(Destination.id.in_(chunk)))
+        found.update(result.scalars())
+    return found
+
+async def load_favorite_destinations(db, user_id: int, pending=None) -> list:
+    """
+    Destinations favorites de l'utilisateur, la plus récente d'abord, en une
+    requête Favorite -> Destination. `pending` ({destination_id: "add"|"remove"},
+    cf. utils/favorite_writer.py) superpose les bascules pas encore écrites.
+    """
+    result = await db.execute(
+        select(Destination)
+        .join(Favorite, Favorite.destination_id == Destination.id)
+        .where(Favorite.user_id == user_id)
+        .order_by(Favorite.created_at.desc(), Favorite.id.desc())
+    )
+    destinations = list(result.scalars())
+    if not pending:
+        return destinations
+
+    destinations = [d for d in destinations if pending.get(d.id) != "remove"]
+    present = {d.id for d in destinations}
+    # Ajouts en attente: les plus récents en tête, comme en base
+    added_ids = [i for i, op in reversed(pending.items()) if op == "add" and i not in present]
+    if added_ids:
+        result = await db.execute(select(Destination).where(Destination.id.in_(added_ids)))
+        by_id = {d.id: d for d in result.scalars()}
+        destinations = [by_id[i] for i in added_ids if i in by_id] + destinations
+    return destinations
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Boolean, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, Table, Index, event, or_, text, update
+from sqlalchemy.orm import relationship, selectinload
 from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -8,7 +8,7 @@ from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import Base, SessionLocal
+from database import Base, JSONType, SessionLocal
 
 # Table d'association pour les destinations dans les packages
 package_destinations = Table(
@@ -29,15 +29,65 @@ class Package(Base):
     duration = Column(Integer)  # en jours
     price = Column(Float)
     discount_price = Column(Float, nullable=True)
+    # Prix payé par le client: discount_price s'il existe, sinon price (voir sync_effective_price)
+    effective_price = Column(Float)
     is_promoted = Column(Boolean, default=False)
-    included_services = Column(JSON)  # Liste des services inclus
-    itinerary = Column(JSON)  # Détails de l'itinéraire
+    included_services = Column(JSONType)  # Liste des services inclus
+    itinerary = Column(JSONType)  # Détails de l'itinéraire
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relation avec les destinations
     destinations = relationship("Destination", secondary=package_destinations, backref="packages")
 
+    # Index composites (clé de tri, id) pour la pagination par curseur
+    __table_args__ = (
+        Index("ix_packages_effective_price_id", "effective_price", "id"),
+        Index("ix_packages_name_id", "name", "id"),
+        # Filtre de durée combiné au filtre de prix
+        Index("ix_packages_duration_effective_price", "duration", "effective_price"),
+        # Tri « promotions d'abord, puis prix croissant »
+        Index("ix_packages_promoted_effective_price", is_promoted.desc(), "effective_price", "id"),
+        # PostgreSQL: index GIN sur les services inclus (filtres par containment @>)
+        Index("ix_packages_included_services_gin", "included_services", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+@event.listens_for(Package, "before_insert")
+@event.listens_for(Package, "before_update")
+def sync_effective_price(mapper, connection, target):
+    """
+    Recalcule effective_price à chaque écriture ORM.
+    """
+    target.effective_price = target.discount_price if target.discount_price is not None else target.price
+
+def sync_effective_prices(bind):
+    """
+    Recalcule effective_price là où il manque ou ne correspond plus aux prix
+    (lignes antérieures à la colonne, écritures SQL brutes). Appelé au démarrage.
+    Supprime aussi l'ancien index (price, id), remplacé par (effective_price, id):
+    create_all() ne retire pas les index disparus du modèle.
+    """
+    expected = func.coalesce(Package.discount_price, Package.price)
+    with bind.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_packages_price_id"))
+        result = conn.execute(
+            update(Package.__table__)
+            .where(or_(Package.effective_price.is_(None), Package.effective_price != expected))
+            .values(effective_price=expected)
+        )
+    return result.rowcount
+
+def promoted_order():
+    """
+    Ordre « promotions d'abord, puis prix payé croissant », id en départage.
+    """
+    return [Package.is_promoted.desc(), Package.effective_price.asc(), Package.id.asc()]
+
+# Options de chargement: les destinations de tous les packages d'une page
+# sont chargées en une seule requête IN au lieu d'un SELECT par package
+def package_load_options():
+    return [selectinload(Package.destinations)]
+
 # Modèles Pydantic pour les requêtes et réponses API
 class ItineraryDayModel(BaseModel):
     day: int
@@ -70,6 +120,7 @@ class DestinationBrief(BaseModel):
 
 class PackageResponse(PackageBase):
     id: int
+    effective_price: Optional[float] = None
     destinations: List[DestinationBrief]
     itinerary: List[Dict[str, Any]]
     created_at: datetime
@@ -77,6 +128,11 @@ class PackageResponse(PackageBase):
     class Config:
         from_attributes = True
 
+class PackagePage(BaseModel):
+    items: List[PackageResponse]
+    next_cursor: Optional[str] = None
+    total_estimate: Optional[int] = None
+
 # Fonction pour initialiser quelques packages par défaut
 def initialize_packages(db):
     # Vérifier si des packages existent déjà
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime # type: ignore
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, event, inspect, select # type: ignore
+from sqlalchemy.orm import Session, object_session # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
 from sqlalchemy.sql import func # type: ignore
 from pydantic import BaseModel, EmailStr, Field # type: ignore
 from typing import Optional, List
@@ -6,18 +8,25 @@ from datetime import datetime, timedelta
 
 import jwt
 from passlib.context import CryptContext # type: ignore
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import Base, SessionLocal
+from database import Base, SessionLocal, get_async_db
+from utils.cache import TTLCache
+# Même clé que pour la signature (routes/auth.py): une seule source
+from utils.auth_utils import SECRET_KEY, ALGORITHM
 
 # Configuration pour JWT
-SECRET_KEY = os.getenv("votre_clé_secrète_à_changer_en_production")
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Cookie posé à la connexion, pour les pages HTML personnalisées (/favorites)
+ACCESS_TOKEN_COOKIE = "access_token"
+
+# Cache des utilisateurs authentifiés (voir get_current_user)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "4096"))
 
 # Configuration pour le hachage des mots de passe
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -51,6 +60,18 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Utilisateur authentifié tel que vu par les routes: copie légère et immuable,
+# partageable entre requêtes contrairement à un objet ORM lié à une session
+class CurrentUser(BaseModel):
+    id: int
+    email: str
+    name: Optional[str] = None
+    is_active: bool = True
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 # Fonctions d'authentification
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -79,28 +100,108 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 # Dépendance pour obtenir l'utilisateur actuel
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Jeton -> email (décodage JWT), et email -> CurrentUser (lecture en base).
+# Le second niveau est invalidé dès qu'un utilisateur est modifié ou supprimé.
+_token_cache = TTLCache(maxsize=AUTH_CACHE_MAXSIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+_principal_cache = TTLCache(maxsize=AUTH_CACHE_MAXSIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+def _decode_token_email(token: str):
+    email = _token_cache.get(token)
+    if email is not None:
+        return email
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = payload.get("sub")
+    if email is None:
+        return None
+    # Ne jamais garder un jeton en cache au-delà de son expiration
+    ttl = AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - datetime.utcnow().timestamp())
+    if ttl > 0:
+        _token_cache.set(token, email, ttl=ttl)
+    return email
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Dépendance FastAPI: la session est celle de la requête (get_async_db est
+    mis en cache par FastAPI), et la base n'est interrogée qu'en cas de défaut
+    de cache.
+    """
+    return await _resolve_user(token, db)
+
+async def get_optional_user(request: Request, db: AsyncSession):
+    """
+    Utilisateur du jeton (en-tête Authorization, sinon cookie), ou None:
+    pour les pages HTML qui s'affichent aussi sans connexion.
+    """
+    token = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token:
+        token = request.cookies.get(ACCESS_TOKEN_COOKIE)
+    if not token:
+        return None
+    # Jeton invalide, expiré ou utilisateur inconnu: page affichée en anonyme
+    try:
+        return await _resolve_user(token, db)
+    except (HTTPException, jwt.PyJWTError):
+        return None
+
+async def _resolve_user(token: str, db: AsyncSession):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Informations d'identification invalides",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        email = _decode_token_email(token)
         if email is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
+
+    principal = _principal_cache.get(email)
+    if principal is None:
+        db_user = await db.scalar(select(User).filter(User.email == email))
+        if db_user is None:
             raise credentials_exception
-        return user
-    finally:
-        db.close()
+        principal = CurrentUser.model_validate(db_user)
+        _principal_cache.set(email, principal)
+
+    if not principal.is_active:
+        raise credentials_exception
+    return principal
+
+def invalidate_user_cache(email: str):
+    _principal_cache.pop(email)
+
+# Invalidation au commit (comme models/favorite.py): au flush, une requête
+# concurrente pourrait encore relire et remettre en cache l'état d'avant
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target):
+    # Ancien email compris, au cas où il vient d'être modifié
+    history = inspect(target).attrs.email.history
+    emails = {email for email in [target.email, *(history.deleted or [])] if email}
+    session = object_session(target)
+    if session is None:
+        for email in emails:
+            invalidate_user_cache(email)
+        return
+    session.info.setdefault("changed_users", set()).update(emails)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for email in session.info.pop("changed_users", ()):
+        invalidate_user_cache(email)
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("changed_users", None)
 
 def create_user(db, user: UserCreate):
     hashed_password = get_password_hash(user.password)
@@ -112,4 +213,18 @@ def create_user(db, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+async def create_user_async(db, user: UserCreate):
+    # Hachage dans le pool bcrypt dédié (utils/auth_utils.py)
+    from utils.auth_utils import get_password_hash_async
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = User(
+        email=user.email,
+        name=user.name,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
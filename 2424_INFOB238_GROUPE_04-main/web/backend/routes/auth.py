@@ -1,7 +1,8 @@
 # routes/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 import sys
@@ -9,9 +10,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.validators import validate_password, validate_email
-from database import get_db
+from database import get_async_db
 from models import user
-from utils.auth_utils import authenticate_user, create_access_token
+from utils.auth_utils import authenticate_user_async, create_access_token
 
 router = APIRouter(
     prefix="/auth",
@@ -20,13 +21,14 @@ router = APIRouter(
 
 @router.post("/login")
 async def login_user(
+    response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Connexion utilisateur - Version simplifiée pour le frontend
     """
-    user_obj = authenticate_user(db, form_data.username, form_data.password)
+    user_obj = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user_obj:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,10 +36,16 @@ async def login_user(
         )
     
     # Créer le token
-    access_token_expires = timedelta(minutes=30)
+    access_token_expires = timedelta(minutes=user.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user_obj.email}, expires_delta=access_token_expires
     )
+    # Même jeton en cookie HttpOnly: les pages HTML (/favorites) le reçoivent
+    # sans JavaScript et peuvent être rendues côté serveur
+    response.set_cookie(
+        user.ACCESS_TOKEN_COOKIE, access_token,
+        max_age=int(access_token_expires.total_seconds()), httponly=True, samesite="lax"
+    )
     
     return {
         "access_token": access_token, 
@@ -46,13 +54,22 @@ async def login_user(
         "user_name": user_obj.name
     }
 
+@router.post("/logout")
+async def logout_user(response: Response):
+    """
+    Déconnexion: supprime le cookie posé par /login (mêmes attributs), sans quoi
+    les pages rendues côté serveur (/favorites) reconnaîtraient encore l'utilisateur.
+    """
+    response.delete_cookie(user.ACCESS_TOKEN_COOKIE, httponly=True, samesite="lax")
+    return {"message": "Déconnexion réussie"}
+
 from models.user import UserCreate, User, create_user
 
 # Modifier la fonction register_user
 @router.post("/register")
 async def register_user(
     user_data: user.UserCreate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Enregistrer un nouvel utilisateur.
@@ -67,11 +84,11 @@ async def register_user(
         raise HTTPException(status_code=400, detail=password_check["errors"])
     
     # Vérifier si l'email existe déjà
-    db_user = db.query(user.User).filter(user.User.email == user_data.email).first()
+    db_user = await db.scalar(select(user.User).filter(user.User.email == user_data.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Cet email est déjà utilisé")
     
     # Créer un nouvel utilisateur
-    new_user = user.create_user(db, user_data)
+    new_user = await user.create_user_async(db, user_data)
     
     return {"message": "Utilisateur créé avec succès", "user_id": new_user.id}
\ No newline at end of file
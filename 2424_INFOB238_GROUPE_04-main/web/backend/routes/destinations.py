@@ -1,31 +1,102 @@
 import sys
 import os
+import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 
-from utils.validators import sanitize_search_term, validate_rating
-from database import get_db
-from models.destination import Destination, DestinationResponse
+from utils.validators import sanitize_search_term, validate_rating, validate_coordinates, parse_id_list
+from utils import search_index, geo_index, map_clusters, facets, catalog_snapshot
+from utils.pagination import resolve_sort, apply_sort, keyset_page, MAX_PAGE_LIMIT
+from utils.response_cache import response_cache, make_key, json_response
+from utils.conditional import catalog_validators, row_validators, is_not_modified, not_modified_response
+from database import get_async_read_db
+from models.destination import Destination, DestinationResponse, DestinationPage, DestinationBatch, DestinationBatchRequest, DestinationNearby, DestinationFacets
 
 router = APIRouter(
     prefix="/destinations",
     tags=["destinations"]
 )
 
-@router.get("/", response_model=List[DestinationResponse])
+# Tris proposés par le frontend (search.js, addSortOptions): nom -> (colonne, décroissant)
+DESTINATION_SORTS = {
+    "popularity": (Destination.rating, True),
+    "rating-desc": (Destination.rating, True),
+    "rating-asc": (Destination.rating, False),
+    "name-asc": (Destination.name, False),
+    "name-desc": (Destination.name, True),
+}
+
+# Lecture groupée (page des favoris): nombre maximal d'ids par appel
+DESTINATION_BATCH_MAX_IDS = int(os.getenv("DESTINATION_BATCH_MAX_IDS", "1000"))
+# Ids par requête IN, sous la limite de paramètres de SQLite
+BATCH_CHUNK_SIZE = 500
+# Recherche à proximité: rayon maximal (km), la moitié du tour de la Terre
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "20000"))
+
+_destination_list = TypeAdapter(List[DestinationResponse])
+_nearby_list = TypeAdapter(List[DestinationNearby])
+
+async def _destination_batch(request: Request, db: AsyncSession, ids: List[int]):
+    """
+    Destinations `ids` dans l'ordre demandé, en une requête IN (par tranche de
+    BATCH_CHUNK_SIZE), avec la liste des ids inexistants.
+    """
+    if len(ids) > DESTINATION_BATCH_MAX_IDS:
+        raise HTTPException(400, detail=f"Au plus {DESTINATION_BATCH_MAX_IDS} ids par requête")
+
+    # L'ordre compte: les ids forment une seule chaîne dans la clé
+    cache_key = make_key("destinations-batch", ids=",".join(map(str, ids)))
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    found = {}
+    for start in range(0, len(ids), BATCH_CHUNK_SIZE):
+        result = await db.execute(
+            select(Destination).where(Destination.id.in_(ids[start:start + BATCH_CHUNK_SIZE]))
+        )
+        found.update((d.id, d) for d in result.scalars())
+
+    batch = DestinationBatch(
+        items=[found[i] for i in ids if i in found],
+        missing=[i for i in ids if i not in found]
+    )
+    body = batch.model_dump_json().encode("utf-8")
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
+
+
+@router.get("/", response_model=Union[List[DestinationResponse], DestinationPage, DestinationBatch])
 async def get_destinations(
+    request: Request,
+    ids: Optional[str] = None,
     search: Optional[str] = None,
     continent: Optional[List[str]] = Query(None),
     price_category: Optional[List[str]] = Query(None),
     min_rating: Optional[float] = None,
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    sort: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
+    # Lecture groupée: ?ids=3,1,2 renvoie {items, missing}, les filtres sont ignorés
+    if ids is not None:
+        id_list = parse_id_list(ids)
+        if id_list is None:
+            raise HTTPException(400, detail="ids doit être une liste d'entiers séparés par des virgules")
+        return await _destination_batch(request, db, id_list)
+
     # Sécuriser le terme de recherche
     if search:
         search = sanitize_search_term(search)
@@ -39,18 +110,38 @@ async def get_destinations(
     """
     Récupérer la liste des destinations avec filtrage.
     """
-    query = db.query(Destination)
+    # Réponse déjà sérialisée pour ces paramètres et cette version du catalogue
+    use_cursor = pagination == "cursor" or bool(cursor)
+    cache_key = make_key(
+        "destinations", search=search, continent=continent, price_category=price_category,
+        min_rating=min_rating, sort=sort, cursor_mode=use_cursor, cursor=cursor,
+        skip=None if use_cursor else skip, limit=limit
+    )
+    # Réponse 304 si le client a déjà cette version de la liste
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    # Instantané en mémoire (CATALOG_SNAPSHOT=1): filtres et tri vectorisés, sans SQL
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None and not search and not use_cursor:
+        sort_key = None
+        if sort:
+            sort_column, descending = resolve_sort(DESTINATION_SORTS, sort)
+            sort_key = (sort_column.key, descending)
+        body = snapshot.destination_page(continent, price_category, min_rating, sort_key, skip, limit)
+        response_cache.set(cache_key, body, etag, last_modified)
+        return json_response(body, etag, last_modified)
+
+    query = select(Destination)
     
-    # Filtrer par terme de recherche
+    # Filtrer par terme de recherche (index FTS5, trié par pertinence)
     if search:
-        search = f"%{search}%"
-        query = query.filter(
-            or_(
-                Destination.name.ilike(search),
-                Destination.country.ilike(search),
-                Destination.description.ilike(search)
-            )
-        )
+        query = search_index.apply_search(query, Destination, search)
     
     # Filtrer par continent
     if continent:
@@ -64,18 +155,189 @@ async def get_destinations(
     if min_rating is not None:
         query = query.filter(Destination.rating >= min_rating)
     
+    # Pagination par curseur: enveloppe {items, next_cursor, total_estimate}
+    if use_cursor:
+        sort_name = sort or "popularity"
+        sort_column, descending = resolve_sort(DESTINATION_SORTS, sort_name)
+        items, next_cursor, total = await keyset_page(
+            db, query, sort_name, sort_column, Destination.id, descending, cursor, limit
+        )
+        page = DestinationPage(items=items, next_cursor=next_cursor, total_estimate=total)
+        body = page.model_dump_json().encode("utf-8")
+        response_cache.set(cache_key, body, etag, last_modified)
+        return json_response(body, etag, last_modified)
+
+    # Appliquer le tri demandé, l'id garantit un ordre stable entre les pages
+    if sort:
+        sort_column, descending = resolve_sort(DESTINATION_SORTS, sort)
+        query = apply_sort(query.order_by(None), sort_column, Destination.id, descending)
+    else:
+        query = query.order_by(Destination.id)
+
     # Appliquer pagination
-    destinations = query.offset(skip).limit(limit).all()
-    
-    return destinations
+    result = await db.execute(query.offset(skip).limit(limit))
+    destinations = result.scalars().all()
+
+    body = _destination_list.dump_json(
+        _destination_list.validate_python(destinations, from_attributes=True)
+    )
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
+
+@router.post("/batch", response_model=DestinationBatch)
+async def get_destinations_batch(
+    request: Request,
+    payload: DestinationBatchRequest,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Même chose que GET /destinations/?ids=..., pour les listes trop longues pour une URL.
+    """
+    return await _destination_batch(request, db, list(dict.fromkeys(payload.ids)))
+
+@router.get("/nearby", response_model=List[DestinationNearby])
+async def get_nearby_destinations(
+    request: Request,
+    lat: float,
+    lng: float,
+    radius_km: float = 100,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Destinations à moins de `radius_km` du point (lat, lng), des plus proches
+    aux plus lointaines, avec leur distance (voir utils/geo_index.py).
+    """
+    if not validate_coordinates(lat, lng):
+        raise HTTPException(400, detail="Coordonnées invalides")
+    if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+        raise HTTPException(400, detail=f"Le rayon doit être compris entre 0 et {NEARBY_MAX_RADIUS_KM:g} km")
+
+    cache_key = make_key("destinations-nearby", lat=lat, lng=lng, radius_km=radius_km, limit=limit)
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    # Candidats des rectangles englobants (sans charger les objets), puis distance exacte
+    rows = (await db.execute(geo_index.candidates_query(lat, lng, radius_km))).all()
+    ranked = geo_index.nearest(rows, lat, lng, radius_km, limit)
+
+    found = {}
+    if ranked:
+        result = await db.execute(select(Destination).where(Destination.id.in_([i for i, _ in ranked])))
+        found = {d.id: d for d in result.scalars()}
+    items = [
+        DestinationNearby(
+            **DestinationResponse.model_validate(found[i]).model_dump(), distance_km=round(distance, 3)
+        )
+        for i, distance in ranked if i in found
+    ]
+    body = _nearby_list.dump_json(items)
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
+
+@router.get("/facets", response_model=DestinationFacets)
+async def get_destination_facets(
+    request: Request,
+    search: Optional[str] = None,
+    continent: Optional[List[str]] = Query(None),
+    price_category: Optional[List[str]] = Query(None),
+    min_rating: Optional[float] = None,
+    activity: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Comptes par continent, catégorie de prix, palier de note et activité pour
+    les filtres donnés (voir utils/facets.py).
+    """
+    if search:
+        search = sanitize_search_term(search) or None
+    if min_rating is not None and not validate_rating(min_rating):
+        raise HTTPException(400, detail="La note doit être entre 0 et 5")
+
+    cache_key = make_key(
+        "destinations-facets", search=search, continent=continent, price_category=price_category,
+        min_rating=min_rating, activity=activity
+    )
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    index = await run_in_threadpool(facets.get_facet_index)
+    base = None
+    if search:
+        # La recherche plein texte reste en SQL; ses résultats deviennent un bitmap
+        result = await db.execute(search_index.apply_search(select(Destination.id), Destination, search))
+        base = index.ids_bitmap(result.scalars())
+    counts = index.counts(
+        base, continent=continent, price_category=price_category, min_rating=min_rating, activities=activity
+    )
+    body = DestinationFacets(**counts).model_dump_json().encode("utf-8")
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
+
+@router.get("/map")
+async def get_destinations_map(
+    request: Request,
+    bbox: str = "-180,-85,180,85",
+    zoom: int = Query(2, ge=0, le=22),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Destinations de la zone `bbox` (ouest,sud,est,nord) regroupées pour le
+    niveau de zoom, en GeoJSON (voir utils/map_clusters.py).
+    """
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(400, detail="bbox doit être ouest,sud,est,nord")
+    if not (validate_coordinates(south, west) and validate_coordinates(north, east)) or south > north:
+        raise HTTPException(400, detail="bbox invalide")
+
+    cache_key = make_key("destinations-map", bbox=bbox, zoom=zoom)
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    index = await map_clusters.get_cluster_index(db)
+    if not index.has_level(zoom):
+        # Premier calcul de ce niveau pour cette version du catalogue, hors de la boucle d'événements
+        await run_in_threadpool(index.level, zoom)
+    collection = index.features(zoom, west, south, east, north)
+    body = json.dumps(collection, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
 
 @router.get("/{destination_id}", response_model=DestinationResponse)
-async def get_destination(destination_id: int, db: Session = Depends(get_db)):
+async def get_destination(request: Request, destination_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Récupérer les détails d'une destination spécifique.
     """
-    db_destination = db.query(Destination).filter(Destination.id == destination_id).first()
+    cache_key = make_key("destination", id=destination_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        if is_not_modified(request, cached.etag, cached.last_modified):
+            return not_modified_response(cached.etag, cached.last_modified)
+        return json_response(cached.body, cached.etag, cached.last_modified)
+
+    db_destination = await db.get(Destination, destination_id)
     if db_destination is None:
         raise HTTPException(status_code=404, detail="Destination non trouvée")
-    
-    return db_destination
\ No newline at end of file
+
+    # Validateurs calculés à partir de la version de la ligne, avant sérialisation
+    etag, last_modified = row_validators("destination", db_destination)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    body = DestinationResponse.model_validate(db_destination).model_dump_json().encode("utf-8")
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
\ No newline at end of file
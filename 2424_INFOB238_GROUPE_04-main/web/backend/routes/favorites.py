@@ -1,100 +1,126 @@
 # routes/favorites.py
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db
+from database import get_async_db
 from models import user, destination, favorite
+from utils.favorite_writer import favorite_writer
 
 router = APIRouter(
     prefix="/favorites",
     tags=["favorites"]
 )
 
+FAVORITES_BULK_MAX_IDS = int(os.getenv("FAVORITES_BULK_MAX_IDS", "1000"))
+
+@router.post("/bulk", response_model=favorite.FavoriteBulkResponse)
+async def bulk_favorites(
+    payload: favorite.FavoriteBulkRequest,
+    current_user: user.CurrentUser = Depends(user.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ajouter et supprimer plusieurs favoris en une transaction (import d'une
+    liste, synchronisation hors ligne). Idempotent: rejouer la même requête
+    ne change rien. Les suppressions sont appliquées avant les ajouts.
+    """
+    to_remove = list(dict.fromkeys(payload.remove))
+    to_add = list(dict.fromkeys(payload.add))
+    if len(to_remove) + len(to_add) > FAVORITES_BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Au plus {FAVORITES_BULK_MAX_IDS} ids par requête")
+    # Les bascules différées antérieures doivent être écrites avant ce lot
+    if favorite_writer.enabled:
+        await favorite_writer.flush()
+
+    removed = await favorite.delete_favorites(db, current_user.id, to_remove) if to_remove else set()
+    added = await favorite.insert_favorites(db, current_user.id, to_add) if to_add else set()
+    # Seuls les ids non ajoutés demandent de distinguer "déjà présent" et "inconnu"
+    not_added = [i for i in to_add if i not in added]
+    existing = await favorite.existing_destination_ids(db, not_added) if not_added else set()
+    await db.commit()
+
+    results = [
+        favorite.FavoriteBulkResult(
+            destination_id=i, action="remove", status="removed" if i in removed else "not_in_favorites"
+        )
+        for i in to_remove
+    ]
+    for i in to_add:
+        status = "added" if i in added else "already_present" if i in existing else "not_found"
+        results.append(favorite.FavoriteBulkResult(destination_id=i, action="add", status=status))
+    return favorite.FavoriteBulkResponse(results=results)
+
 @router.post("/{destination_id}")
 async def add_favorite(
     destination_id: int,
-    current_user: user.User = Depends(user.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: user.CurrentUser = Depends(user.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ajouter une destination aux favoris de l'utilisateur.
     """
-    # Vérifier si la destination existe
-    db_destination = db.query(destination.Destination).filter(
-        destination.Destination.id == destination_id
-    ).first()
-    if db_destination is None:
-        raise HTTPException(status_code=404, detail="Destination non trouvée")
-    
-    # Vérifier si la destination est déjà dans les favoris
-    db_favorite = db.query(favorite.Favorite).filter(
-        favorite.Favorite.user_id == current_user.id,
-        favorite.Favorite.destination_id == destination_id
-    ).first()
-    
-    if db_favorite:
+    if favorite_writer.enabled:
+        # Écriture différée: seule l'existence de la destination est vérifiée
+        if not await favorite.existing_destination_ids(db, [destination_id]):
+            raise HTTPException(status_code=404, detail="Destination non trouvée")
+        favorite_writer.enqueue(current_user.id, destination_id, "add")
+        return JSONResponse(status_code=202, content={"message": "Destination ajoutée aux favoris"})
+
+    added = await favorite.insert_favorites(db, current_user.id, [destination_id])
+    if not added:
+        # Pas d'insertion: destination inconnue ou déjà dans les favoris
+        exists = await favorite.existing_destination_ids(db, [destination_id])
+        await db.rollback()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Destination non trouvée")
         raise HTTPException(
             status_code=400, 
             detail="Cette destination est déjà dans vos favoris"
         )
-    
-    # Ajouter aux favoris
-    new_favorite = favorite.Favorite(
-        user_id=current_user.id, 
-        destination_id=destination_id
-    )
-    db.add(new_favorite)
-    db.commit()
-    db.refresh(new_favorite)
+    await db.commit()
     
     return {"message": "Destination ajoutée aux favoris"}
 
 @router.delete("/{destination_id}")
 async def remove_favorite(
     destination_id: int,
-    current_user: user.User = Depends(user.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: user.CurrentUser = Depends(user.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Supprimer une destination des favoris de l'utilisateur.
     """
-    # Rechercher le favori
-    db_favorite = db.query(favorite.Favorite).filter(
-        favorite.Favorite.user_id == current_user.id,
-        favorite.Favorite.destination_id == destination_id
-    ).first()
-    
-    if not db_favorite:
+    if favorite_writer.enabled:
+        favorite_writer.enqueue(current_user.id, destination_id, "remove")
+        return JSONResponse(status_code=202, content={"message": "Destination supprimée des favoris"})
+
+    removed = await favorite.delete_favorites(db, current_user.id, [destination_id])
+    if not removed:
+        await db.rollback()
         raise HTTPException(
             status_code=404, 
             detail="Cette destination n'est pas dans vos favoris"
         )
-    
-    # Supprimer des favoris
-    db.delete(db_favorite)
-    db.commit()
+    await db.commit()
     
     return {"message": "Destination supprimée des favoris"}
 
 @router.get("/", response_model=List[destination.DestinationResponse])
 async def get_favorites(
-    current_user: user.User = Depends(user.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: user.CurrentUser = Depends(user.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Récupérer les destinations favorites de l'utilisateur.
     """
-    # Requête pour obtenir les destinations favorites
-    favorites = db.query(destination.Destination).join(
-        favorite.Favorite, 
-        favorite.Favorite.destination_id == destination.Destination.id
-    ).filter(
-        favorite.Favorite.user_id == current_user.id
-    ).all()
-    
-    return favorites 
\ No newline at end of file
+    # Une requête Favorite -> Destination, plus les bascules encore en attente
+    return await favorite.load_favorite_destinations(
+        db, current_user.id, favorite_writer.pending_for(current_user.id)
+    )
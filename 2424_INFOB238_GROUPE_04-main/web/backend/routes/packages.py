@@ -1,61 +1,153 @@
 # routes/packages.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from typing import List, Optional, Union
 
-from database import get_db
-from models.package import Package, PackageResponse
+from database import get_async_read_db
+from utils import search_index, catalog_snapshot
+from utils.pagination import resolve_sort, apply_sort, keyset_page, MAX_PAGE_LIMIT
+from utils.response_cache import response_cache, make_key, json_response
+from utils.conditional import catalog_validators, row_validators, is_not_modified, not_modified_response
+from models.package import Package, PackageResponse, PackagePage, package_load_options, promoted_order
 
 router = APIRouter(
     prefix="/packages",
     tags=["packages"]
 )
 
-@router.get("/", response_model=List[PackageResponse])
+# Tris disponibles: nom -> (colonne, décroissant). Le prix est celui payé (effective_price)
+PACKAGE_SORTS = {
+    "price-asc": (Package.effective_price, False),
+    "price-desc": (Package.effective_price, True),
+    "duration-asc": (Package.duration, False),
+    "duration-desc": (Package.duration, True),
+    "name-asc": (Package.name, False),
+    "name-desc": (Package.name, True),
+}
+# Promotions d'abord, puis prix croissant (index ix_packages_promoted_effective_price).
+# Trois clés de sens différents: pagination par offset uniquement.
+PROMOTED_SORT = "promoted"
+
+_package_list = TypeAdapter(List[PackageResponse])
+
+@router.get("/", response_model=Union[List[PackageResponse], PackagePage])
 async def get_packages(
+    request: Request,
     search: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_duration: Optional[int] = None,
-    skip: int = 0, 
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    sort: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    
-    
-   
     """
     Récupérer la liste des packages avec filtrage.
     """
-    query = db.query(Package)
+    # Réponse déjà sérialisée pour ces paramètres et cette version du catalogue
+    use_cursor = pagination == "cursor" or bool(cursor)
+    if use_cursor and sort == PROMOTED_SORT:
+        raise HTTPException(400, detail="Le tri promoted n'est pas disponible en pagination par curseur")
+    cache_key = make_key(
+        "packages", search=search, min_price=min_price, max_price=max_price,
+        min_duration=min_duration, sort=sort, cursor_mode=use_cursor, cursor=cursor,
+        skip=None if use_cursor else skip, limit=limit
+    )
+    # Réponse 304 si le client a déjà cette version de la liste
+    etag, last_modified = catalog_validators(cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, etag, last_modified)
+
+    # Instantané en mémoire (CATALOG_SNAPSHOT=1): filtres et tri vectorisés, sans SQL
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None and not search and not use_cursor:
+        sort_key = None
+        if sort == PROMOTED_SORT:
+            sort_key = (PROMOTED_SORT, False)
+        elif sort:
+            sort_column, descending = resolve_sort(PACKAGE_SORTS, sort)
+            sort_key = (sort_column.key, descending)
+        body = snapshot.package_page(min_price, max_price, min_duration, sort_key, skip, limit)
+        response_cache.set(cache_key, body, etag, last_modified)
+        return json_response(body, etag, last_modified)
+
+    query = select(Package).options(*package_load_options())
     
-    # Filtrage par recherche
+    # Filtrage par recherche (index FTS5, trié par pertinence)
     if search:
-        search = f"%{search}%"
-        query = query.filter(Package.name.ilike(search) | Package.description.ilike(search))
+        query = search_index.apply_search(query, Package, search)
     
-    # Filtrage par prix
+    # Filtrage sur le prix payé (remise comprise)
     if min_price is not None:
-        query = query.filter(Package.price >= min_price)
+        query = query.filter(Package.effective_price >= min_price)
     if max_price is not None:
-        query = query.filter(Package.price <= max_price)
+        query = query.filter(Package.effective_price <= max_price)
     
     # Filtrage par durée
     if min_duration is not None:
         query = query.filter(Package.duration >= min_duration)
     
+    # Pagination par curseur: enveloppe {items, next_cursor, total_estimate}
+    if use_cursor:
+        sort_name = sort or "price-asc"
+        sort_column, descending = resolve_sort(PACKAGE_SORTS, sort_name)
+        items, next_cursor, total = await keyset_page(
+            db, query, sort_name, sort_column, Package.id, descending, cursor, limit
+        )
+        page = PackagePage(items=items, next_cursor=next_cursor, total_estimate=total)
+        body = page.model_dump_json().encode("utf-8")
+        response_cache.set(cache_key, body, etag, last_modified)
+        return json_response(body, etag, last_modified)
+
+    # Appliquer le tri demandé, l'id garantit un ordre stable entre les pages
+    if sort == PROMOTED_SORT:
+        query = query.order_by(None).order_by(*promoted_order())
+    elif sort:
+        sort_column, descending = resolve_sort(PACKAGE_SORTS, sort)
+        query = apply_sort(query.order_by(None), sort_column, Package.id, descending)
+    else:
+        query = query.order_by(Package.id)
+
     # Pagination
-    packages = query.offset(skip).limit(limit).all()
-    
-    return packages
+    result = await db.execute(query.offset(skip).limit(limit))
+    packages = result.scalars().all()
+
+    body = _package_list.dump_json(
+        _package_list.validate_python(packages, from_attributes=True)
+    )
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
 
 @router.get("/{package_id}", response_model=PackageResponse)
-async def get_package(package_id: int, db: Session = Depends(get_db)):
+async def get_package(request: Request, package_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Récupérer les détails d'un package spécifique.
     """
-    db_package = db.query(Package).filter(Package.id == package_id).first()
+    cache_key = make_key("package", id=package_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        if is_not_modified(request, cached.etag, cached.last_modified):
+            return not_modified_response(cached.etag, cached.last_modified)
+        return json_response(cached.body, cached.etag, cached.last_modified)
+
+    db_package = await db.get(Package, package_id, options=package_load_options())
     if db_package is None:
         raise HTTPException(status_code=404, detail="Package non trouvé")
-    
-    return db_package
\ No newline at end of file
+
+    # Validateurs calculés à partir de la version de la ligne, avant sérialisation
+    etag, last_modified = row_validators("package", db_package, db_package.destinations)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    body = PackageResponse.model_validate(db_package).model_dump_json().encode("utf-8")
+    response_cache.set(cache_key, body, etag, last_modified)
+    return json_response(body, etag, last_modified)
\ No newline at end of file
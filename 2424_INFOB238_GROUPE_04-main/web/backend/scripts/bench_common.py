@@ -0,0 +1,142 @@
+# scripts/bench_common.py
+"""
+Outils partagés par les scripts de mesure et de vérification de scripts/.
+
+Les scripts travaillent sur une base SQLite temporaire, jamais sur
+data/travel_db.sqlite: use_temp_database() doit être appelé avant tout import
+de database (l'engine est créé à l'import, à partir de DATABASE_URL).
+Le catalogue est généré de façon déterministe (graine fixe).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONTINENTS = ("Europe", "Asie", "Afrique", "Amérique du Nord", "Amérique du Sud", "Océanie")
+PRICE_CATEGORIES = ("budget", "moderate", "luxury")
+ACTIVITIES = ("Plage", "Randonnée", "Musées", "Gastronomie", "Plongée", "Ski", "Safari", "Shopping")
+SYLLABLES = ("ma", "ri", "po", "ta", "ven", "lo", "sa", "qui", "dor", "bel", "mon", "fa", "ro", "lu", "zan", "é")
+WORDS = (
+    "plage", "montagne", "musée", "marché", "temple", "lagon", "désert", "vignoble", "forêt", "château",
+    "croisière", "volcan", "cathédrale", "île", "canyon", "village", "festival", "cuisine", "port", "jardin",
+)
+
+
+def use_temp_database(prefix="bench"):
+    """
+    Pointe DATABASE_URL vers un fichier SQLite temporaire et renvoie son chemin.
+    Avec SCRIPTS_DATABASE_URL (par ex. une base PostgreSQL jetable et vide),
+    c'est cette base qui est utilisée à la place; renvoie alors None.
+    """
+    external = os.getenv("SCRIPTS_DATABASE_URL")
+    if external:
+        os.environ["DATABASE_URL"] = external
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        return None
+    path = os.path.join(tempfile.mkdtemp(prefix=f"{prefix}_"), "travel_db.sqlite")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    return path
+
+
+def _word(rng, syllables=3):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def _description(rng, vocabulary, length):
+    # Surtout des mots rares, et quelques mots thématiques (WORDS)
+    words = [rng.choice(vocabulary) for _ in range(length)]
+    for i in rng.sample(range(length), 2):
+        words[i] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def generate_catalog(engine, destinations=1000, packages=200, seed=0):
+    """
+    Insère `destinations` destinations et `packages` packages (3 destinations
+    chacun) générés aléatoirement, par INSERT en masse.
+    Les colonnes dérivées (latitude/longitude, effective_price) sont renseignées
+    directement: les listeners ORM ne voient pas les INSERT en masse.
+    """
+    from sqlalchemy import insert
+    from models.destination import Destination
+    from models.package import Package, package_destinations
+
+    rng = random.Random(seed)
+    vocabulary = [_word(rng, rng.randint(2, 4)).lower() for _ in range(5000)]
+    destination_rows = []
+    for _ in range(destinations):
+        lat, lng = round(rng.uniform(-60, 70), 5), round(rng.uniform(-180, 180), 5)
+        destination_rows.append({
+            "name": f"{_word(rng)} {_word(rng, 2)}",
+            "country": _word(rng, 2),
+            "continent": rng.choice(CONTINENTS),
+            "description": _description(rng, vocabulary, 40),
+            "image_url": "/static/images/destinations/default.jpg",
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "price_category": rng.choice(PRICE_CATEGORIES),
+            "coordinates": {"lat": lat, "lng": lng},
+            "latitude": lat,
+            "longitude": lng,
+            "activities": rng.sample(ACTIVITIES, 3),
+            "weather_info": {"spring": "Doux", "summer": "Chaud", "autumn": "Doux", "winter": "Frais"},
+        })
+
+    package_rows = []
+    for _ in range(packages):
+        price = round(rng.uniform(400, 6000), 2)
+        discount_price = round(price * 0.8, 2) if rng.random() < 0.3 else None
+        package_rows.append({
+            "name": f"Circuit {_word(rng)}",
+            "description": _description(rng, vocabulary, 30),
+            "image_url": "/static/images/packages/default.jpg",
+            "duration": rng.choice((3, 5, 7, 10, 14)),
+            "price": price,
+            "discount_price": discount_price,
+            "effective_price": discount_price if discount_price is not None else price,
+            "is_promoted": rng.random() < 0.1,
+            "included_services": ["Hébergement", "Transferts"],
+            "itinerary": [{"day": 1, "title": "Arrivée", "description": "Accueil", "activities": []}],
+        })
+
+    with engine.begin() as conn:
+        first_destination = conn.execute(insert(Destination.__table__).returning(Destination.id), destination_rows[:1]).scalar()
+        if len(destination_rows) > 1:
+            conn.execute(insert(Destination.__table__), destination_rows[1:])
+        if package_rows:
+            first_package = conn.execute(insert(Package.__table__).returning(Package.id), package_rows[:1]).scalar()
+            if len(package_rows) > 1:
+                conn.execute(insert(Package.__table__), package_rows[1:])
+            links = [
+                {"package_id": first_package + i, "destination_id": first_destination + rng.randrange(destinations)}
+                for i in range(len(package_rows)) for _ in range(3)
+            ]
+            conn.execute(insert(package_destinations), links)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed(func, repeat):
+    """
+    Durées (ms) de `repeat` appels à func().
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples):
+    return f"p50 {percentile(samples, 50):7.2f} ms  p95 {percentile(samples, 95):7.2f} ms  p99 {percentile(samples, 99):7.2f} ms"
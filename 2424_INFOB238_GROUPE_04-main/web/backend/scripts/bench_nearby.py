@@ -0,0 +1,86 @@
+# scripts/bench_nearby.py
+"""
+Recherche « à proximité » (utils/geo_index.py): R*Tree contre rectangles
+englobants sur l'index B-tree (latitude, longitude).
+
+    python scripts/bench_nearby.py --points 1000000 --queries 50
+
+Sur une base temporaire, insère `points` destinations réduites à leurs
+coordonnées (tirées comme dans bench_common.generate_catalog), crée le R*Tree
+(ensure_geo_index), puis mesure pour plusieurs rayons la partie de la route
+/api/destinations/nearby qui dépend de l'index: requête des candidats
+(candidates_query) et sélection des plus proches (nearest). Les deux chemins
+doivent renvoyer les mêmes destinations, dans le même ordre.
+"""
+import argparse
+import random
+import time
+
+from bench_common import use_temp_database, timed, summary
+
+use_temp_database("bench_nearby")
+
+from sqlalchemy import insert
+
+from database import Base, engine
+from models.destination import Destination
+from utils import geo_index
+
+RADII_KM = (100, 500, 2000)
+CHUNK = 50000
+
+
+def insert_points(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        for start in range(0, count, CHUNK):
+            conn.execute(insert(Destination.__table__), [
+                {"name": f"Point {i}", "latitude": round(rng.uniform(-60, 70), 5),
+                 "longitude": round(rng.uniform(-180, 180), 5)}
+                for i in range(start, min(start + CHUNK, count))
+            ])
+
+
+def run(points: int, queries: int, limit: int):
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    insert_points(points)
+    print(f"{points} points insérés en {time.perf_counter() - start:.1f} s")
+    start = time.perf_counter()
+    geo_index.ensure_geo_index(engine)
+    print(f"Remplissage initial du R*Tree: {time.perf_counter() - start:.1f} s")
+
+    rng = random.Random(1)
+    centers = [(rng.uniform(-55, 65), rng.uniform(-180, 180)) for _ in range(queries)]
+    print(f"{queries} requêtes par rayon, limit={limit}")
+
+    with engine.connect() as conn:
+        def search(lat, lng, radius_km):
+            rows = conn.execute(geo_index.candidates_query(lat, lng, radius_km)).all()
+            return len(rows), geo_index.nearest(rows, lat, lng, radius_km, limit)
+
+        try:
+            for radius_km in RADII_KM:
+                print(f"\nRayon {radius_km} km")
+                results = {}
+                for mode, enabled in (("B-tree", False), ("R*Tree", True)):
+                    geo_index._rtree_enabled = enabled
+                    found = [search(lat, lng, radius_km) for lat, lng in centers]
+                    candidates = sum(count for count, _ in found) / len(found)
+                    samples = []
+                    for lat, lng in centers:
+                        samples += timed(lambda: search(lat, lng, radius_km), 1)
+                    results[mode] = [ranked for _, ranked in found]
+                    print(f"  {mode}  {candidates:9.0f} candidats en moyenne  {summary(samples)}")
+                assert results["B-tree"] == results["R*Tree"], f"{radius_km} km: résultats différents"
+        finally:
+            geo_index._rtree_enabled = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recherche à proximité: R*Tree contre B-tree")
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    run(args.points, args.queries, args.limit)
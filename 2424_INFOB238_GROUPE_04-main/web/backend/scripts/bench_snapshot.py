@@ -0,0 +1,133 @@
+# scripts/bench_snapshot.py
+"""
+Instantané en colonnes (utils/catalog_snapshot.py) contre le chemin SQL des
+listes /api/destinations/ et /api/packages/.
+
+    python scripts/bench_snapshot.py --destinations 100000 --packages 20000 --repeat 20
+
+Sur une base temporaire et un catalogue généré, avec CATALOG_SNAPSHOT=1:
+1. vérifie, pour un ensemble de combinaisons filtres/tri/skip/limit, que les
+   deux chemins renvoient des corps identiques à l'octet près;
+2. mesure quelques requêtes représentatives de bout en bout (TestClient).
+Le cache de réponses est vidé avant chaque requête; le chemin SQL est forcé
+en masquant l'instantané le temps de la requête.
+"""
+import argparse
+import itertools
+import os
+import sys
+
+from bench_common import use_temp_database, generate_catalog, timed, summary
+
+use_temp_database("bench_snapshot")
+os.environ["CATALOG_SNAPSHOT"] = "1"
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from database import Base, engine
+import models.favorite, models.package, models.user  # noqa: F401 (tables)
+
+DESTINATION_CASES = list(itertools.product(
+    (None, ["Europe"], ["Europe", "Asie"]),                  # continent
+    (None, ["budget"]),                                     # price_category
+    (None, 4.0),                                            # min_rating
+    (None, "rating-desc", "rating-asc", "name-asc", "name-desc"),
+    ((0, 100), (0, 20), (2000, 50), (10 ** 6, 100)),        # (skip, limit)
+))
+PACKAGE_CASES = list(itertools.product(
+    (None, 1000),                                           # min_price
+    (None, 3000),                                           # max_price
+    (None, 7),                                              # min_duration
+    (None, "price-asc", "price-desc", "duration-asc", "duration-desc", "name-asc", "name-desc", "promoted"),
+    ((0, 100), (0, 20), (2000, 50), (10 ** 6, 100)),
+))
+TIMED_CASES = (
+    ("sans filtre", "/api/destinations/", {}),
+    ("continent + tri note", "/api/destinations/", {"continent": "Europe", "sort": "rating-desc"}),
+    ("note + prix + nom, skip 2000", "/api/destinations/",
+     {"min_rating": 3.5, "price_category": "moderate", "sort": "name-asc", "skip": 2000}),
+    ("2 continents + note, limit 20", "/api/destinations/",
+     {"continent": ["Europe", "Asie"], "sort": "rating-desc", "limit": 20}),
+    ("packages, prix + durée, promoted", "/api/packages/",
+     {"min_price": 1000, "max_price": 3000, "min_duration": 7, "sort": "promoted"}),
+)
+
+
+def _params(names, values):
+    params = {}
+    for name, value in zip(names, values):
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def fetch(client, path, params, use_snapshot):
+    from utils import catalog_snapshot
+    from utils.response_cache import response_cache
+
+    response_cache.clear()
+    snapshot = catalog_snapshot._snapshot
+    if not use_snapshot:
+        catalog_snapshot._snapshot = None
+    try:
+        response = client.get(path, params=params)
+    finally:
+        catalog_snapshot._snapshot = snapshot
+    assert response.status_code == 200, (path, params, response.status_code)
+    return response.content
+
+
+def compare_bodies(client):
+    cases = []
+    for continent, price_category, min_rating, sort, (skip, limit) in DESTINATION_CASES:
+        cases.append(("/api/destinations/", _params(
+            ("continent", "price_category", "min_rating", "sort", "skip", "limit"),
+            (continent, price_category, min_rating, sort, skip, limit),
+        )))
+    for min_price, max_price, min_duration, sort, (skip, limit) in PACKAGE_CASES:
+        cases.append(("/api/packages/", _params(
+            ("min_price", "max_price", "min_duration", "sort", "skip", "limit"),
+            (min_price, max_price, min_duration, sort, skip, limit),
+        )))
+    different = [
+        (path, params) for path, params in cases
+        if fetch(client, path, params, True) != fetch(client, path, params, False)
+    ]
+    for path, params in different[:10]:
+        print(f"  DIFFÉRENT: {path} {params}")
+    print(f"{len(cases) - len(different)}/{len(cases)} combinaisons identiques à l'octet près")
+    return not different
+
+
+def run(destinations, packages, repeat):
+    Base.metadata.create_all(bind=engine)
+    generate_catalog(engine, destinations=destinations, packages=packages)
+
+    from fastapi.testclient import TestClient
+    import main
+    from utils import catalog_snapshot
+
+    snapshot = catalog_snapshot.get_snapshot()
+    assert snapshot is not None, "instantané indisponible (NumPy installé ?)"
+    print(f"{destinations} destinations, {packages} packages; instantané construit en {snapshot.build_seconds:.1f} s\n")
+
+    client = TestClient(main.app)
+    identical = compare_bodies(client)
+
+    print(f"\nDurée par requête, {repeat} répétitions")
+    for label, path, params in TIMED_CASES:
+        print(f"{label}")
+        for mode, use_snapshot in (("SQL       ", False), ("instantané", True)):
+            samples = timed(lambda: fetch(client, path, params, use_snapshot), repeat)
+            print(f"  {mode} {summary(samples)}")
+    return identical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instantané du catalogue contre SQL")
+    parser.add_argument("--destinations", type=int, default=100000)
+    parser.add_argument("--packages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.destinations, args.packages, args.repeat) else 1)
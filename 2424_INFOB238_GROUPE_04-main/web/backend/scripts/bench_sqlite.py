@@ -0,0 +1,157 @@
+# scripts/bench_sqlite.py
+"""
+Charge mixte lecture/écriture sur SQLite, selon le profil de connexion de
+database.py (journal, pragmas, pools).
+
+    python scripts/bench_sqlite.py --readers 16 --writers 4 --duration 10
+
+Lecteurs: pages du catalogue (liste de destinations, packages par prix).
+Écrivains: ajout puis retrait d'un favori, un commit chacun, comme les
+routes /api/favorites. Les deux passent par les sessions asynchrones de
+l'application (AsyncSessionLocal, AsyncReadSessionLocal).
+
+database.py lit sa configuration à l'import: chaque profil tourne donc dans
+un sous-processus, avec ses variables d'environnement et sa propre base.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from bench_common import use_temp_database, generate_catalog, percentile
+
+# Profil: (variables d'environnement, lectures sur le pool en lecture seule)
+PROFILES = {
+    "rollback, pragmas par défaut": ({
+        "SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0", "SQLITE_CACHE_SIZE_KB": "2000",
+    }, False),
+    "WAL + pragmas, pool unique": ({}, False),
+    "WAL + pragmas, pool lecture": ({}, True),
+    "WAL + pragmas, pool lecture, pools 2+0": ({
+        "DB_POOL_SIZE": "2", "DB_MAX_OVERFLOW": "0",
+        "DB_READ_POOL_SIZE": "2", "DB_READ_MAX_OVERFLOW": "0",
+    }, True),
+}
+
+DESTINATIONS = 2000
+PACKAGES = 500
+
+
+async def _reader(session_factory, rng, deadline, samples, errors):
+    from sqlalchemy import select
+    from sqlalchemy.exc import OperationalError
+    from models.destination import Destination
+    from models.package import Package
+
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.5:
+            query = select(Destination).order_by(Destination.id).offset(rng.randrange(DESTINATIONS)).limit(20)
+        else:
+            low = rng.randrange(400, 5000)
+            query = select(Package).where(Package.effective_price.between(low, low + 500)).limit(20)
+        start = time.perf_counter()
+        try:
+            async with session_factory() as db:
+                (await db.execute(query)).scalars().all()
+        except OperationalError:
+            errors["read"] += 1
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+async def _writer(user_id, rng, deadline, samples, errors):
+    from sqlalchemy import delete, insert
+    from sqlalchemy.exc import OperationalError
+    from database import AsyncSessionLocal
+    from models.favorite import Favorite
+
+    while time.perf_counter() < deadline:
+        destination_id = rng.randrange(1, DESTINATIONS + 1)
+        for statement in (
+            insert(Favorite).values(user_id=user_id, destination_id=destination_id),
+            delete(Favorite).where(Favorite.user_id == user_id, Favorite.destination_id == destination_id),
+        ):
+            start = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(statement)
+                    await db.commit()
+            except OperationalError:
+                errors["write"] += 1
+                continue
+            samples.append((time.perf_counter() - start) * 1000)
+
+
+async def _workload(read_pool, readers, writers, duration):
+    from database import AsyncReadSessionLocal, AsyncSessionLocal, async_engine, async_read_engine
+
+    session_factory = AsyncReadSessionLocal if read_pool else AsyncSessionLocal
+    reads, writes, errors = [], [], {"read": 0, "write": 0}
+    deadline = time.perf_counter() + duration
+    # Les user_id n'ont pas de ligne users: SQLite ne vérifie pas les clés étrangères
+    try:
+        await asyncio.gather(
+            *(_reader(session_factory, random.Random(i), deadline, reads, errors) for i in range(readers)),
+            *(_writer(i + 1, random.Random(1000 + i), deadline, writes, errors) for i in range(writers)),
+        )
+    finally:
+        # Connexions aiosqlite fermées: leurs threads retiendraient sinon le processus
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    return reads, writes, errors
+
+
+def run_profile(read_pool, readers, writers, duration):
+    """Sous-processus: base temporaire, charge mixte, résultat en JSON."""
+    use_temp_database("bench_sqlite")
+    from database import Base, engine
+    import models.favorite, models.package, models.user  # noqa: F401 (tables)
+
+    Base.metadata.create_all(bind=engine)
+    generate_catalog(engine, destinations=DESTINATIONS, packages=PACKAGES)
+    reads, writes, errors = asyncio.run(_workload(read_pool, readers, writers, duration))
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    return {
+        "journal_mode": journal_mode,
+        "reads": len(reads) / duration,
+        "read_p50": percentile(reads, 50), "read_p99": percentile(reads, 99),
+        "writes": len(writes) / duration,
+        "write_p50": percentile(writes, 50), "write_p99": percentile(writes, 99),
+        "errors": errors,
+    }
+
+
+def compare(readers, writers, duration):
+    print(f"{readers} lecteurs, {writers} écrivains, {duration:.0f} s par profil")
+    for name, (env, read_pool) in PROFILES.items():
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--profile", name,
+             "--readers", str(readers), "--writers", str(writers), "--duration", str(duration)],
+            env=dict(os.environ, **env), capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"- {name} (journal {result['journal_mode']})")
+        print(f"    lectures  {result['reads']:7.0f}/s  p50 {result['read_p50']:7.1f} ms  p99 {result['read_p99']:7.1f} ms  "
+              f"erreurs {result['errors']['read']}")
+        print(f"    écritures {result['writes']:7.0f}/s  p50 {result['write_p50']:7.1f} ms  p99 {result['write_p99']:7.1f} ms  "
+              f"erreurs {result['errors']['write']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Charge mixte lecture/écriture sur SQLite")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(PROFILES[args.profile][1], args.readers, args.writers, args.duration)))
+    else:
+        compare(args.readers, args.writers, args.duration)
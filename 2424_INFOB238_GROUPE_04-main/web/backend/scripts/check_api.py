@@ -0,0 +1,266 @@
+# scripts/check_api.py
+"""
+Vérifications de bout en bout de l'API, sur une base temporaire.
+
+    python scripts/check_api.py
+
+Chaque vérification lève AssertionError en cas d'échec; le script se termine
+alors avec un code de sortie non nul.
+"""
+import asyncio
+import os
+import sys
+
+from bench_common import use_temp_database, generate_catalog
+
+use_temp_database("check_api")
+# Un seul processus: pas de relecture de la version, qui fausserait les comptes de requêtes
+os.environ["CATALOG_VERSION_POLL_SECONDS"] = "0"
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from fastapi.testclient import TestClient
+
+import main
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import ASYNC_DATABASE_URL, count_queries, engine
+from models.destination import Destination
+from utils.catalog_version import bump_catalog_version, catalog_versions, get_catalog_version, refresh_catalog_version
+from utils.pagination import MAX_PAGE_LIMIT, apply_sort, encode_cursor, keyset_page
+
+# Routes de liste: le nombre de requêtes SQL ne doit pas dépendre du nombre de lignes
+LIST_ROUTES = (
+    "/api/destinations/",
+    "/api/destinations/?pagination=cursor&limit=50",
+    "/api/packages/",
+    "/api/packages/?pagination=cursor&limit=50",
+    "/api/packages/?sort=promoted",
+    "/destinations",
+    "/packages",
+)
+
+
+def query_counts(client):
+    counts = {}
+    for path in LIST_ROUTES:
+        with count_queries() as counter:
+            response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        counts[path] = counter.count
+    return counts
+
+
+def check_constant_queries(client):
+    generate_catalog(engine, destinations=20, packages=20, seed=1)
+    # Nouvelle version: les caches de réponses et de pages ne servent plus
+    bump_catalog_version()
+    small = query_counts(client)
+    generate_catalog(engine, destinations=500, packages=500, seed=2)
+    bump_catalog_version()
+    large = query_counts(client)
+    for path in LIST_ROUTES:
+        assert small[path] == large[path], f"{path}: {small[path]} requêtes, puis {large[path]}"
+        print(f"  {path}: {large[path]} requête(s)")
+
+
+async def _walk_cursor(sort_column, descending, limit):
+    # Engine propre à cette boucle: le pool de l'application appartient à celle du TestClient
+    check_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    ids, cursor = [], None
+    try:
+        async with AsyncSession(check_engine) as db:
+            while True:
+                rows, cursor, _ = await keyset_page(
+                    db, select(Destination), "check", sort_column, Destination.id, descending, cursor, limit
+                )
+                ids += [row.id for row in rows]
+                if not cursor:
+                    return ids
+    finally:
+        await check_engine.dispose()
+
+
+def check_cursor_null_keys(client):
+    # Une destination sur cinq sans note: les pages franchissent la limite NULL / non NULL.
+    # Appel direct de keyset_page: DestinationResponse exige une note.
+    with engine.begin() as conn:
+        conn.execute(update(Destination.__table__).where(Destination.id % 5 == 0).values(rating=None))
+    try:
+        for descending in (False, True):
+            with engine.connect() as conn:
+                expected = [row.id for row in conn.execute(
+                    apply_sort(select(Destination.id), Destination.rating, Destination.id, descending)
+                )]
+            walked = asyncio.run(_walk_cursor(Destination.rating, descending, 7))
+            label = "rating décroissant" if descending else "rating croissant"
+            assert walked == expected, f"{label}: {len(walked)} lignes en mode curseur, {len(expected)} attendues"
+            print(f"  {label}: {len(walked)} lignes, dans l'ordre de la requête complète")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(update(Destination.__table__).where(Destination.rating.is_(None)).values(rating=0.0))
+
+
+def check_pagination_params(client):
+    # limit hors bornes: refusé par la validation des routes (422), dans les deux modes
+    for path in ("/api/destinations/", "/api/packages/"):
+        for mode in ("offset", "cursor"):
+            for limit in (0, -1, MAX_PAGE_LIMIT + 1):
+                response = client.get(path, params={"pagination": mode, "limit": limit})
+                assert response.status_code == 422, (path, mode, limit, response.status_code)
+        response = client.get(path, params={"skip": -1})
+        assert response.status_code == 422, (path, "skip=-1", response.status_code)
+    # Curseurs modifiés: types de la clé ou du total incohérents avec le tri
+    for sort, key, total in (
+        ("rating-desc", ["abc", 1], 10),
+        ("rating-desc", [{"a": 1}, 1], 10),
+        ("rating-desc", [4.5, "1"], 10),
+        ("rating-desc", [4.5, None], 10),
+        ("rating-desc", [True, 1], 10),
+        ("name-asc", [3, 1], 10),
+        ("name-asc", ["Paris", 1], "abc"),
+    ):
+        cursor = encode_cursor({"sort": sort, "key": key, "total": total})
+        response = client.get("/api/destinations/", params={"sort": sort, "cursor": cursor})
+        assert response.status_code == 400, (sort, key, total, response.status_code)
+    print("  limit hors bornes, skip négatif: 422; curseurs modifiés: 400")
+
+
+def check_bad_ids(client):
+    # Chiffres Unicode et entiers hors BIGINT: 400, jamais 500
+    for ids in ("²", "1,²", "٣", "99999999999999999999", "abc"):
+        response = client.get("/api/destinations/", params={"ids": ids})
+        assert response.status_code == 400, (ids, response.status_code)
+    print("  ids invalides: 400")
+
+
+def _login(client, email, password="Voyage2024!"):
+    client.post("/api/auth/register", json={"email": email, "name": "Vérification", "password": password})
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200, ("login", response.status_code, response.text)
+    return response.json()["access_token"]
+
+
+def check_auth_round_trip(client):
+    # Jeton signé à la connexion (utils/auth_utils.py), vérifié par models/user.py
+    token = _login(client, "aller-retour@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    for method, path, expected in (
+        ("post", "/api/favorites/1", 200),
+        ("get", "/api/favorites/", 200),
+        ("delete", "/api/favorites/1", 200),
+    ):
+        response = getattr(client, method)(path, headers=headers)
+        assert response.status_code == expected, (method, path, response.status_code, response.text[:200])
+    response = client.get("/api/favorites/", headers={"Authorization": "Bearer jeton-invalide"})
+    assert response.status_code == 401, ("jeton invalide", response.status_code)
+    print("  connexion, ajout, liste et retrait d'un favori: OK; jeton invalide: 401")
+
+
+def check_favorites_page(client):
+    # Page HTML des favoris: cookie posé par la connexion, décodé par get_optional_user
+    _login(client, "page-favoris@example.com")
+    assert client.cookies.get("access_token"), "cookie de connexion absent"
+    try:
+        response = client.get("/favorites")
+        assert response.status_code == 200, ("cookie valide", response.status_code)
+        assert "Connexion requise" not in response.text, "cookie valide: page anonyme"
+        # Déconnexion: le cookie est supprimé, la page redevient anonyme
+        response = client.post("/api/auth/logout")
+        assert response.status_code == 200, ("déconnexion", response.status_code)
+        assert not client.cookies.get("access_token"), "cookie conservé après déconnexion"
+        assert "Connexion requise" in client.get("/favorites").text, "page personnalisée après déconnexion"
+        for label, kwargs in (
+            ("cookie invalide", {"cookies": {"access_token": "jeton-invalide"}}),
+            ("en-tête invalide", {"headers": {"Authorization": "Bearer jeton-invalide"}}),
+        ):
+            client.cookies.clear()
+            response = client.get("/favorites", **kwargs)
+            assert response.status_code == 200, (label, response.status_code)
+            assert "Connexion requise" in response.text, f"{label}: page non anonyme"
+    finally:
+        client.cookies.clear()
+    print("  cookie valide: favoris de l'utilisateur; déconnexion et jeton invalide: page anonyme")
+
+
+def check_user_cache_after_commit(client):
+    # Utilisateur désactivé: le cache ne doit plus le servir une fois la modification validée
+    from database import SessionLocal
+    from models.user import User
+
+    token = _login(client, "desactive@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/favorites/", headers=headers).status_code == 200
+    db = SessionLocal()
+    try:
+        db_user = db.query(User).filter(User.email == "desactive@example.com").one()
+        db_user.is_active = False
+        db.flush()
+        # Flush sans commit: l'utilisateur reste actif pour les autres sessions
+        assert client.get("/api/favorites/", headers=headers).status_code == 200
+        db.commit()
+    finally:
+        db.close()
+    response = client.get("/api/favorites/", headers=headers)
+    assert response.status_code == 401, ("utilisateur désactivé", response.status_code)
+    print("  utilisateur désactivé: refusé dès le commit")
+
+
+def _shared_version():
+    with engine.connect() as conn:
+        return conn.execute(select(catalog_versions.c.version)).scalar_one()
+
+
+def check_shared_catalog_version(client):
+    # Écriture ORM: la ligne catalog_version est incrémentée avec les données
+    from database import SessionLocal
+
+    before = _shared_version()
+    db = SessionLocal()
+    try:
+        db.get(Destination, 1).name = "Version partagée"
+        db.commit()
+    finally:
+        db.close()
+    assert _shared_version() == get_catalog_version() == before + 1, ("écriture ORM", before, _shared_version())
+    # Écriture d'un autre worker: données et version changent ensemble, ce processus relit la ligne
+    # Liste: ETag dérivé de la version du catalogue (utils/conditional.py)
+    path = "/api/destinations/?limit=5"
+    etag = client.get(path).headers["etag"]
+    with engine.begin() as conn:
+        conn.execute(update(Destination.__table__).where(Destination.id == 1).values(name="Autre worker"))
+        conn.execute(update(catalog_versions).values(version=catalog_versions.c.version + 1))
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304, "avant relecture"
+    refresh_catalog_version()
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()[0]["name"] == "Autre worker", (
+        "après relecture", response.status_code
+    )
+    assert response.headers["etag"] != etag, "même ETag pour des données différentes"
+    print(f"  version partagée: {before} -> {get_catalog_version()}, caches et ETags suivent la base")
+
+
+CHECKS = (
+    check_constant_queries, check_cursor_null_keys, check_pagination_params, check_bad_ids, check_auth_round_trip, check_favorites_page,
+    check_user_cache_after_commit, check_shared_catalog_version,
+)
+
+
+def run():
+    failures = 0
+    # Une seule boucle pour toutes les requêtes: les connexions asyncpg du pool y sont liées
+    with TestClient(main.app) as client:
+        for check in CHECKS:
+            print(check.__name__)
+            try:
+                check(client)
+            except AssertionError as error:
+                failures += 1
+                print(f"  ÉCHEC: {error}")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run() else 0)
@@ -0,0 +1,136 @@
+# scripts/load_test.py
+"""
+Test de charge de l'API: N clients concurrents, latences p50/p95/p99.
+
+    python scripts/load_test.py --clients 200 --duration 20
+    python scripts/load_test.py --url http://127.0.0.1:8000 --clients 200
+
+Sans --url, le script crée une base temporaire (catalogue généré), lance
+uvicorn dessus (un worker) et l'arrête à la fin. Avec --url, il vise un
+serveur déjà lancé, par exemple une ancienne version pour comparer.
+
+Les paramètres (skip, id, prix) sont tirés au hasard à chaque requête pour
+que les caches de réponses ne masquent pas le coût des requêtes en base.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench_common import use_temp_database, generate_catalog, percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_mix(rng, destinations, packages):
+    """Chemin de la prochaine requête: listes, détails et filtres, au hasard."""
+    choice = rng.random()
+    if choice < 0.35:
+        return "/api/destinations/", f"/api/destinations/?skip={rng.randrange(destinations)}&limit=20"
+    if choice < 0.65:
+        return "/api/destinations/{id}", f"/api/destinations/{rng.randrange(1, destinations + 1)}"
+    if choice < 0.85:
+        low = rng.randrange(400, 5000)
+        return "/api/packages/", f"/api/packages/?min_price={low}&max_price={low + 500}&limit=20"
+    return "/api/packages/{id}", f"/api/packages/{rng.randrange(1, packages + 1)}"
+
+
+async def _client(http, rng, deadline, destinations, packages, samples, errors):
+    while time.perf_counter() < deadline:
+        route, path = request_mix(rng, destinations, packages)
+        start = time.perf_counter()
+        try:
+            response = await http.get(path)
+            failed = response.status_code >= 500
+        except httpx.HTTPError:
+            failed = True
+        elapsed = (time.perf_counter() - start) * 1000
+        if failed:
+            errors[route] = errors.get(route, 0) + 1
+        else:
+            samples.setdefault(route, []).append(elapsed)
+
+
+async def run_load(url, clients, duration, destinations, packages, seed=0):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    samples, errors = {}, {}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        # Préchauffage: connexions ouvertes, modules importés
+        await asyncio.gather(*(http.get("/api/destinations/1") for _ in range(min(clients, 20))), return_exceptions=True)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _client(http, random.Random(seed + i), deadline, destinations, packages, samples, errors)
+            for i in range(clients)
+        ))
+
+    every = [value for values in samples.values() for value in values]
+    print(f"{clients} clients, {duration:.0f} s: {len(every)} requêtes, {len(every) / duration:.0f} req/s, "
+          f"{sum(errors.values())} erreurs (5xx ou délai dépassé)")
+    for route in sorted(samples):
+        values = samples[route]
+        print(f"  {route:24s} {len(values):6d}  p50 {percentile(values, 50):8.1f} ms  "
+              f"p95 {percentile(values, 95):8.1f} ms  p99 {percentile(values, 99):8.1f} ms")
+    print(f"  {'total':24s} {len(every):6d}  p50 {percentile(every, 50):8.1f} ms  "
+          f"p95 {percentile(every, 95):8.1f} ms  p99 {percentile(every, 99):8.1f} ms")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(destinations, packages):
+    """Base temporaire + uvicorn en sous-processus; renvoie (url, processus)."""
+    use_temp_database("load_test")
+    from database import Base, engine
+    import models.favorite, models.package, models.user  # noqa: F401 (tables)
+
+    Base.metadata.create_all(bind=engine)
+    generate_catalog(engine, destinations=destinations, packages=packages)
+    engine.dispose()
+
+    # Journal des requêtes coupé (lents compris): on mesure l'API, pas l'écriture des logs
+    env = dict(os.environ, LOG_SAMPLE_RATE="0", LOG_SLOW_REQUEST_MS="1e9")
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            if httpx.get(f"{url}/api/destinations/1", timeout=1).status_code == 200:
+                return url, process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge de l'API")
+    parser.add_argument("--url", help="Serveur à tester (sinon: serveur temporaire)")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--destinations", type=int, default=2000)
+    parser.add_argument("--packages", type=int, default=500)
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        url, process = start_server(args.destinations, args.packages)
+    try:
+        asyncio.run(run_load(url, args.clients, args.duration, args.destinations, args.packages))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
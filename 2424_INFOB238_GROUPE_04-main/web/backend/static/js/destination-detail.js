@@ -346,7 +346,7 @@ function toggleFavorite(destinationId, addToFavorite) {
     const token = localStorage.getItem('token');
     if (token) {
         const method = addToFavorite ? 'POST' : 'DELETE';
-        fetch(`http://localhost:8000/favorites/${destinationId}`, {
+        fetch(`/api/favorites/${destinationId}`, {
             method: method,
             headers: {
                 'Authorization': `Bearer ${token}`,
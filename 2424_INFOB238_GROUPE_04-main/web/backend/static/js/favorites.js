@@ -38,6 +38,12 @@ function loadFavorites() {
     // Élément conteneur pour les favoris
     const favoritesGrid = document.querySelector('.favorites-grid');
     if (!favoritesGrid) return;
+
+    // Liste déjà rendue par le serveur: il ne reste qu'à brancher les boutons
+    if (favoritesGrid.dataset.serverRendered === 'true') {
+        initFavoriteButtons();
+        return;
+    }
     
     // IMPORTANT: Vérifier si une autre fonction a déjà chargé du contenu
     if (favoritesGrid.children.length > 0) {
@@ -74,24 +80,9 @@ function loadFavorites() {
         return;
     }
     
-    // Récupérer les détails de chaque destination favorite
-    Promise.all(
-        favoriteIds.map(id => 
-            fetch(`http://localhost:8000/destinations/${id}`)
-            .then(response => {
-                if (!response.ok) throw new Error(`Destination ${id} non trouvée`);
-                return response.json();
-            })
-            .catch(error => {
-                console.error(error);
-                return null; // Retourner null pour les destinations non trouvées
-            })
-        )
-    )
-    .then(destinations => {
-        // Filtrer les destinations null (non trouvées)
-        const validDestinations = destinations.filter(dest => dest !== null);
-        
+    // Récupérer les détails de toutes les destinations favorites en une requête
+    fetchDestinations(favoriteIds)
+    .then(validDestinations => {
         // Afficher les données pour déboguer
         console.log("Données des destinations reçues:", validDestinations);
         
@@ -128,25 +119,38 @@ function useFallbackFavorites(favoritesGrid) {
         return;
     }
     
-    // Récupérer les détails de chaque destination favorite
-    Promise.all(
-        favoriteIds.map(id => 
-            fetch(`http://localhost:8000/destinations/${id}`)
-            .then(response => {
-                if (!response.ok) throw new Error(`Destination ${id} non trouvée`);
-                return response.json();
-            })
-            .catch(error => {
-                console.error(error);
-                return null; // Retourner null pour les destinations non trouvées
-            })
-        )
-    )
-    .then(destinations => {
-        // Filtrer les destinations null (non trouvées)
-        const validDestinations = destinations.filter(dest => dest !== null);
-        displayFavorites(validDestinations, favoritesGrid);
-    });
+    // Récupérer les détails de toutes les destinations favorites en une requête
+    fetchDestinations(favoriteIds)
+    .then(validDestinations => displayFavorites(validDestinations, favoritesGrid))
+    .catch(error => console.error('Erreur:', error));
+}
+
+/**
+ * Récupère plusieurs destinations en une seule requête, dans l'ordre demandé
+ * @param {Array} ids - IDs des destinations
+ * @returns {Promise<Array>} - Les destinations trouvées (les ids inconnus sont ignorés)
+ */
+function fetchDestinations(ids) {
+    // Au-delà d'une centaine d'ids, la liste passe dans le corps de la requête
+    const request = ids.length > 100
+        ? fetch('/api/destinations/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ids: ids.map(Number) })
+        })
+        : fetch(`/api/destinations/?ids=${ids.map(encodeURIComponent).join(',')}`);
+
+    return request
+        .then(response => {
+            if (!response.ok) throw new Error(`Erreur ${response.status} lors du chargement des favoris`);
+            return response.json();
+        })
+        .then(batch => {
+            if (batch.missing.length > 0) {
+                console.warn("Destinations non trouvées:", batch.missing);
+            }
+            return batch.items;
+        });
 }
 
 /**
@@ -288,7 +292,7 @@ function toggleFavorite(destinationId, isFavorite) {
     const token = localStorage.getItem('token');
     if (token) {
         const method = isFavorite ? 'DELETE' : 'POST';
-        fetch(`http://localhost:8000/favorites/${destinationId}`, {
+        fetch(`/api/favorites/${destinationId}`, {
             method: method,
             headers: {
                 'Authorization': `Bearer ${token}`,
@@ -62,16 +62,6 @@ function initializeMap(container) {
         'Océanie': '#009688'
     };
     
-    // Points de base pour chaque continent (pour répartir les destinations sans coordonnées)
-    const continentBasePoints = {
-        'Europe': { x: 500, y: 200, spread: 60 },
-        'Asie': { x: 800, y: 250, spread: 80 },
-        'Amérique du Nord': { x: 300, y: 220, spread: 70 },
-        'Amérique du Sud': { x: 350, y: 400, spread: 60 },
-        'Afrique': { x: 550, y: 300, spread: 70 },
-        'Océanie': { x: 950, y: 450, spread: 50 }
-    };
-    
     // Ajouter les continents (représentation simplifiée)
     addSimplifiedContinents(svg);
     
@@ -115,63 +105,34 @@ function initializeMap(container) {
     loadingText.textContent = 'Chargement des destinations...';
     svg.appendChild(loadingText);
     
-    // Charger les destinations depuis l'API
-    fetch('http://localhost:8000/destinations')
+    // Charger les destinations, regroupées par le serveur pour une vue du monde entier
+    fetch('/api/destinations/map?bbox=-180,-85,180,85&zoom=2')
         .then(response => {
             if (!response.ok) {
                 throw new Error(`Erreur lors de la récupération des destinations: ${response.status}`);
             }
             return response.json();
         })
-        .then(apiDestinations => {
+        .then(collection => {
             // Supprimer le message de chargement
             const loadingElement = document.getElementById('loading-text');
             if (loadingElement) {
                 loadingElement.remove();
             }
             
-            // Compteur par continent pour répartir les destinations sans coordonnées
-            const continentCounters = {
-                'Europe': 0,
-                'Asie': 0,
-                'Amérique du Nord': 0,
-                'Amérique du Sud': 0, 
-                'Afrique': 0,
-                'Océanie': 0
-            };
-            
-            // Transformer les données de l'API en format attendu pour la carte
-            const destinations = apiDestinations.map(dest => {
-                // Calculer une position approximative sur la carte
-                let x, y;
-                
-                if (dest.coordinates && dest.coordinates.lat && dest.coordinates.lng) {
-                    // Convertir lat/lng en coordonnées SVG approximatives
-                    x = ((dest.coordinates.lng + 180) / 360) * 1200; // -180 à +180 → 0 à 1200
-                    y = ((90 - dest.coordinates.lat) / 180) * 600;   // +90 à -90 → 0 à 600
-                } else {
-                    // Position par défaut basée sur le continent avec léger décalage pour éviter la superposition
-                    const basePoint = continentBasePoints[dest.continent] || { x: 600, y: 300, spread: 50 };
-                    // Incrémenter le compteur pour ce continent
-                    continentCounters[dest.continent] = (continentCounters[dest.continent] || 0) + 1;
-                    const counter = continentCounters[dest.continent];
-                    
-                    // Calculer angle et rayon pour répartition circulaire
-                    const angle = (counter * Math.PI * 0.5) % (Math.PI * 2);
-                    const radius = Math.min(20 + (counter % 5) * 10, basePoint.spread);
-                    
-                    x = basePoint.x + Math.cos(angle) * radius;
-                    y = basePoint.y + Math.sin(angle) * radius;
-                }
-                
+            // Transformer les features GeoJSON en points de la carte
+            const destinations = collection.features.map(feature => {
+                const [lng, lat] = feature.geometry.coordinates;
+                const properties = feature.properties;
                 return {
-                    id: dest.id,
-                    name: dest.name,
-                    country: dest.country || '',
-                    x: x,
-                    y: y,
-                    continent: dest.continent,
-                    description: dest.description || ''
+                    id: properties.id,
+                    name: properties.cluster ? `${properties.point_count} destinations` : properties.name,
+                    country: '',
+                    count: properties.cluster ? properties.point_count : 1,
+                    x: ((lng + 180) / 360) * 1200, // -180 à +180 → 0 à 1200
+                    y: ((90 - lat) / 180) * 600,   // +90 à -90 → 0 à 600
+                    continent: properties.continent,
+                    description: ''
                 };
             });
             
@@ -183,7 +144,9 @@ function initializeMap(container) {
                 const point = document.createElementNS('http://www.w3.org/2000/svg', 'circle');
                 point.setAttribute('cx', dest.x);
                 point.setAttribute('cy', dest.y);
-                point.setAttribute('r', '8');
+                // Les groupes sont plus gros, selon le nombre de destinations
+                const baseRadius = dest.count > 1 ? Math.min(8 + Math.log2(dest.count) * 3, 24) : 8;
+                point.setAttribute('r', baseRadius);
                 point.setAttribute('fill', continentColors[dest.continent] || '#999');
                 point.setAttribute('stroke', 'white');
                 point.setAttribute('stroke-width', '2');
@@ -195,11 +158,11 @@ function initializeMap(container) {
                 
                 // Animation au survol
                 point.addEventListener('mouseenter', function(e) {
-                    this.setAttribute('r', '10');
+                    this.setAttribute('r', baseRadius + 2);
                     this.setAttribute('stroke-width', '3');
                     
                     // Afficher l'infobulle
-                    tooltipText.textContent = `${dest.name}, ${dest.country}`;
+                    tooltipText.textContent = dest.country ? `${dest.name}, ${dest.country}` : dest.name;
                     const textBBox = tooltipText.getBBox();
                     
                     tooltipRect.setAttribute('width', textBBox.width + 20);
@@ -210,15 +173,17 @@ function initializeMap(container) {
                 });
                 
                 point.addEventListener('mouseleave', function() {
-                    this.setAttribute('r', '8');
+                    this.setAttribute('r', baseRadius);
                     this.setAttribute('stroke-width', '2');
                     tooltip.setAttribute('visibility', 'hidden');
                 });
                 
                 // Redirection vers la page de détail
-                point.addEventListener('click', function() {
-                    window.location.href = `destination-detail.html?id=${dest.id}`;
-                });
+                if (dest.count === 1) {
+                    point.addEventListener('click', function() {
+                        window.location.href = `/destination/${dest.id}`;
+                    });
+                }
                 
                 destinationsGroup.appendChild(point);
                 
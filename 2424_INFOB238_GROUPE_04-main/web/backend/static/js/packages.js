@@ -136,9 +136,12 @@ function loadPackages(filters = {}, sortBy = 'popularity') {
     `;
     
     // Construire l'URL avec les filtres
-    let url = 'http://localhost:8000/packages/';
+    let url = '/api/packages/';
     const params = new URLSearchParams();
     
+    // Tri effectué par l'API (popularité = promotions d'abord, puis prix payé)
+    params.append('sort', sortBy === 'popularity' ? 'promoted' : sortBy);
+    
     // Ajouter les filtres à l'URL
     if (filters.search) params.append('search', filters.search);
     if (filters.minPrice) params.append('min_price', filters.minPrice);
@@ -180,9 +183,6 @@ function loadPackages(filters = {}, sortBy = 'popularity') {
                 return;
             }
             
-            // Trier les packages si nécessaire
-            sortPackages(packages, sortBy);
-            
             // Créer une carte pour chaque package avec animation
             packages.forEach((package, index) => {
                 const packageCard = createPackageCard(package, index);
@@ -203,28 +203,6 @@ function loadPackages(filters = {}, sortBy = 'popularity') {
         });
 }
 
-/**
- * Trie un tableau de packages
- * @param {Array} packages - Tableau de packages à trier
- * @param {string} sortBy - Critère de tri
- */
-function sortPackages(packages, sortBy) {
-    switch (sortBy) {
-        case 'price-asc':
-            packages.sort((a, b) => a.price - b.price);
-            break;
-        case 'price-desc':
-            packages.sort((a, b) => b.price - a.price);
-            break;
-        case 'duration-asc':
-            packages.sort((a, b) => a.duration - b.duration);
-            break;
-        // Par défaut, tri par popularité (assumé comme étant déjà trié)
-        default:
-            break;
-    }
-}
-
 /**
  * Crée une carte de package
  * @param {Object} package - Données du package
@@ -237,8 +215,9 @@ function createPackageCard(package, index) {
     card.style.setProperty('--animation-order', index);
     
     // Vérifier si le package a une promotion
-    const hasDiscount = package.old_price && package.old_price > package.price;
-    const discountPercentage = hasDiscount ? Math.round((1 - package.price / package.old_price) * 100) : 0;
+    const currentPrice = package.effective_price ?? package.price;
+    const hasDiscount = currentPrice < package.price;
+    const discountPercentage = hasDiscount ? Math.round((1 - currentPrice / package.price) * 100) : 0;
     
     // Déterminer le chemin de l'image en fonction du package
     let imagePath;
@@ -271,8 +250,8 @@ function createPackageCard(package, index) {
             <p>${package.description ? package.description.substring(0, 100) + (package.description.length > 100 ? '...' : '') : 'Description non disponible'}</p>
             <div class="package-footer">
                 <div class="package-price">
-                    ${hasDiscount ? `<span class="old-price">${package.old_price.toFixed(2)} €</span>` : ''}
-                    <span class="current-price">${package.price.toFixed(2)} €</span>
+                    ${hasDiscount ? `<span class="old-price">${package.price.toFixed(2)} €</span>` : ''}
+                    <span class="current-price">${currentPrice.toFixed(2)} €</span>
                 </div>
                 <a href="package-detail.html?id=${package.id}" class="btn-details">Voir plus</a>
             </div>
@@ -238,6 +238,41 @@ function enhanceFilters() {
     }
 }
 
+/**
+ * Affiche à côté de chaque case à cocher des filtres le nombre de destinations
+ * correspondantes, calculé par le serveur pour les autres filtres actifs
+ * @param {string} queryString - Filtres actuels (continent, price_category, min_rating, search)
+ */
+function updateFacetCounts(queryString) {
+    const labels = document.querySelectorAll('.filter-options label');
+    if (labels.length === 0) return;
+    
+    fetch(`/api/destinations/facets${queryString ? '?' + queryString : ''}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Erreur ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            labels.forEach(label => {
+                const checkbox = label.querySelector('input[type="checkbox"]');
+                if (!checkbox || !data.facets[checkbox.name]) return;
+                
+                let countSpan = label.querySelector('.facet-count');
+                if (!countSpan) {
+                    countSpan = document.createElement('span');
+                    countSpan.className = 'facet-count';
+                    label.appendChild(countSpan);
+                }
+                const count = data.facets[checkbox.name][checkbox.value] || 0;
+                countSpan.textContent = `(${count})`;
+                label.classList.toggle('facet-empty', count === 0 && !checkbox.checked);
+            });
+        })
+        .catch(error => console.error('Erreur lors du chargement des comptes de filtres:', error));
+}
+
 /**
  * Gère l'affichage des filtres en mode mobile
  */
@@ -387,8 +422,9 @@ function initeupdateUserInterface() {
                         // Stocker temporairement la position de défilement
                         sessionStorage.setItem('scrollPosition', scrollPosition);
                         
-                        // Recharger la page
-                        window.location.reload();
+                        // Supprimer le cookie HttpOnly côté serveur, puis recharger la page
+                        fetch('/api/auth/logout', { method: 'POST', credentials: 'same-origin' })
+                            .finally(() => window.location.reload());
                     });
                 }
                 
@@ -580,6 +616,9 @@ function searchDestinations() {
     // Enlever le dernier '&' ou '?' si présent
     apiUrl = apiUrl.replace(/[?&]$/, '');
     
+    // Comptes des filtres pour les mêmes critères (mêmes paramètres que la liste)
+    updateFacetCounts(apiUrl.split('?')[1] || '');
+    
     // Appel à l'API
     fetch(apiUrl)
         .then(response => {
@@ -776,7 +815,7 @@ function toggleFavorite(destinationId, add) {
     const token = localStorage.getItem('token');
     if (token) {
         const method = add ? 'POST' : 'DELETE';
-        fetch(`http://localhost:8000/favorites/${destinationId}`, {
+        fetch(`/api/favorites/${destinationId}`, {
             method: method,
             headers: {
                 'Authorization': `Bearer ${token}`,
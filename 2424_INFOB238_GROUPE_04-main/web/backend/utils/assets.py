@@ -0,0 +1,96 @@
+# utils/assets.py
+"""
+Fichiers statiques versionnés (voir build_assets.py).
+
+build_assets.py minifie les CSS/JS de static/, ajoute l'empreinte du contenu
+au nom de chaque fichier (css/style.css -> css/style.3f2a1b9c0d.css) et écrit
+les variantes .gz/.br dans ASSETS_DIR, avec un manifest. Les templates passent
+par asset_url(): URL versionnée /assets/... si le fichier a été construit,
+sinon le chemin /static/... d'origine. Une URL versionnée ne change jamais de
+contenu: elle est servie avec Cache-Control immutable. Les fichiers des builds
+précédents encore listés par le manifest ("previous") restent servis, pour
+les pages rendues avant le dernier build.
+"""
+import hashlib
+import json
+import os
+
+from fastapi import HTTPException, Request
+from starlette.responses import FileResponse, Response
+
+from utils.build_info import set_assets_fingerprint
+from utils.conditional import is_not_modified
+from utils.page_cache import accepts_encoding
+
+ASSETS_DIR = os.getenv("ASSETS_DIR", "./static_build")
+ASSETS_URL = "/assets"
+MANIFEST_NAME = "assets-manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# (Content-Encoding, extension), par ordre de préférence
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest = {}   # chemin source -> chemin versionné
+_files = {}      # chemin versionné -> entrée du manifest (build courant et précédents)
+
+
+def load_manifest(directory: str = ASSETS_DIR):
+    global _manifest, _files
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        _manifest, _files = {}, {}
+        set_assets_fingerprint(None)
+        return
+    with open(manifest_path, "rb") as f:
+        raw = f.read()
+    manifest = json.loads(raw)
+    # Nouvelles URLs d'assets -> nouveaux ETags des pages qui les contiennent
+    set_assets_fingerprint(hashlib.sha1(raw).hexdigest()[:16])
+    _manifest = {source: entry["file"] for source, entry in manifest["assets"].items()}
+    files = {}
+    for previous in reversed(manifest.get("previous", [])):
+        files.update(previous)
+    files.update({entry["file"]: entry for entry in manifest["assets"].values()})
+    _files = files
+
+
+def asset_url(path: str) -> str:
+    """
+    Helper Jinja: {{ asset_url('css/style.css') }}.
+    """
+    path = path.lstrip("/")
+    built = _manifest.get(path)
+    if built is None:
+        return f"/static/{path}"
+    return f"{ASSETS_URL}/{built}"
+
+
+def asset_response(request: Request, path: str) -> Response:
+    """
+    Sert un fichier versionné, précompressé si le client l'accepte. Seuls les
+    fichiers du manifest sont servis (pas de parcours de répertoire).
+    FileResponse gère les requêtes partielles (Range), toujours sur le fichier
+    non compressé: les octets demandés sont ceux du contenu d'origine.
+    """
+    entry = _files.get(path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+
+    etag = f'"{entry["hash"]}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if entry["encodings"]:
+        headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    file_path = os.path.join(ASSETS_DIR, path)
+    encodings = entry["encodings"] if "range" not in request.headers else ()
+    for encoding, suffix in ENCODINGS:
+        if encoding in encodings and accepts_encoding(request, encoding):
+            headers["Content-Encoding"] = encoding
+            file_path += suffix
+            break
+    return FileResponse(file_path, media_type=entry["media_type"], headers=headers)
+
+
+load_manifest()
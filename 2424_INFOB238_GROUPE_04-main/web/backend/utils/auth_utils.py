@@ -1,11 +1,18 @@
 from passlib.context import CryptContext
+from fastapi import HTTPException
 
+import asyncio
 import jwt
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
 
-SECRET_KEY = "votre_clé_secrète_à_changer_en_production"
+# Clé unique de signature et de vérification des jetons (models/user.py l'importe)
+SECRET_KEY = os.getenv("SECRET_KEY", "votre_clé_secrète_à_changer_en_production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -45,4 +52,107 @@ def authenticate_user(db, email: str, password: str):
         return False
     if not verify_password(password, user.hashed_password):
         return False
-    return user
\ No newline at end of file
+    return user
+
+# ==================== POOL DE HACHAGE BCRYPT ====================
+# bcrypt coûte ~250 ms de CPU par appel: on l'exécute dans un pool de threads
+# dédié et borné (bcrypt libère le GIL) pour ne pas geler la boucle d'événements.
+# Au-delà de PASSWORD_HASH_MAX_PENDING opérations en attente, on répond 503.
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending = 0
+_metrics_lock = threading.Lock()
+_metrics = {
+    "operations": 0,
+    "rejected": 0,
+    "rehashed": 0,
+    "wait_seconds_total": 0.0,
+    "hash_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "hash_seconds_max": 0.0,
+}
+
+def _timed(submitted_at, func, *args):
+    """
+    Exécuté dans le pool: mesure séparément l'attente dans la file et le calcul.
+    """
+    started_at = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        finished_at = time.perf_counter()
+        wait, spent = started_at - submitted_at, finished_at - started_at
+        with _metrics_lock:
+            _metrics["operations"] += 1
+            _metrics["wait_seconds_total"] += wait
+            _metrics["hash_seconds_total"] += spent
+            _metrics["wait_seconds_max"] = max(_metrics["wait_seconds_max"], wait)
+            _metrics["hash_seconds_max"] = max(_metrics["hash_seconds_max"], spent)
+
+async def _run_in_hash_pool(func, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        with _metrics_lock:
+            _metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Service d'authentification surchargé, veuillez réessayer",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, _timed, time.perf_counter(), func, *args)
+    finally:
+        _pending -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hache un mot de passe dans le pool dédié
+    """
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    """
+    Vérifie un mot de passe dans le pool dédié.
+    Retourne (valide, nouveau_hash); nouveau_hash n'est pas None quand passlib
+    juge le hash existant obsolète (needs_update) et qu'il faut le remplacer.
+    """
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def get_password_hash_metrics() -> dict:
+    """
+    Statistiques du pool: temps d'attente dans la file vs temps de hachage
+    """
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    snapshot["pending"] = _pending
+    snapshot["workers"] = PASSWORD_HASH_WORKERS
+    snapshot["max_pending"] = PASSWORD_HASH_MAX_PENDING
+    return snapshot
+
+async def authenticate_user_async(db, email: str, password: str):
+    """
+    Variante de authenticate_user pour une session asynchrone (AsyncSession).
+    Le hash est remplacé de façon transparente s'il doit être mis à jour.
+    """
+    from sqlalchemy import select
+    from models.user import User
+
+    user = await db.scalar(select(User).filter(User.email == email))
+    if not user:
+        return False
+    is_valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not is_valid:
+        return False
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        with _metrics_lock:
+            _metrics["rehashed"] += 1
+    return user
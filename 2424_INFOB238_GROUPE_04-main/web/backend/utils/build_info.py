@@ -0,0 +1,54 @@
+# utils/build_info.py
+"""
+Version de l'application déployée, mêlée aux validateurs HTTP (utils/conditional.py).
+
+Les ETags et Last-Modified décrivent l'état des données. Après un déploiement
+qui change un template, la forme d'une réponse JSON ou les URLs des assets,
+le même état des données donne pourtant un autre corps: la version de build
+est donc ajoutée à chaque ETag. Elle combine:
+- APP_VERSION si défini (par ex. le commit déployé), sinon l'empreinte du
+  code Python et des templates, calculée au démarrage;
+- l'empreinte du manifest des assets, renseignée par utils/assets.py.
+STARTED_AT (démarrage du processus) sert de plancher au Last-Modified.
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Répertoires sans effet sur les réponses (données, sorties de build, outils)
+IGNORED_DIRS = {"__pycache__", "data", "dist", "logs", "scripts", "static", "static_build"}
+
+STARTED_AT = datetime.now(timezone.utc)
+
+_assets_fingerprint = "none"
+
+
+def source_fingerprint(root: str = BACKEND_DIR) -> str:
+    """
+    Empreinte du code (*.py) et des templates (*.html), indépendante des dates
+    de fichiers: deux processus sur le même code obtiennent la même valeur.
+    """
+    digest = hashlib.sha1()
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d not in IGNORED_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith((".py", ".html")):
+                continue
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+APP_VERSION = os.getenv("APP_VERSION") or source_fingerprint()
+
+
+def set_assets_fingerprint(value: str):
+    global _assets_fingerprint
+    _assets_fingerprint = value or "none"
+
+
+def get_build_version() -> str:
+    return f"{APP_VERSION}:{_assets_fingerprint}"
@@ -0,0 +1,226 @@
+# utils/catalog_snapshot.py
+"""
+Instantané en mémoire du catalogue, en colonnes NumPy (optionnel).
+
+Avec CATALOG_SNAPSHOT=1 (et NumPy installé), les destinations et les packages
+sont chargés au démarrage dans un instantané immuable:
+- colonnes numériques (note, prix, durée, coordonnées) en tableaux float64,
+  NULL -> NaN, et colonnes catégorielles (continent, price_category) codées en entiers;
+- pour chaque tri proposé par l'API, la permutation des lignes déjà triée
+  (clé, id), calculée une fois;
+- chaque élément déjà sérialisé en JSON (DestinationResponse, PackageResponse).
+
+Une liste filtrée et triée se calcule alors par masques vectorisés: le masque
+des filtres, lu dans l'ordre de la permutation du tri, donne directement les
+lignes de la page, sans requête ni objet ORM. Les NULL suivent l'ordre de
+SQLite (en tête en ordre croissant, en fin en ordre décroissant).
+
+Après un changement du catalogue, un nouvel instantané est construit dans un
+thread puis remplace l'ancien d'une simple affectation: les lecteurs ne
+prennent aucun verrou. Tant qu'il n'est pas prêt, get_snapshot() renvoie None
+et les routes passent par SQL, qui ne sert donc jamais de données périmées.
+La recherche plein texte et la pagination par curseur restent en SQL.
+"""
+import logging
+import os
+import threading
+import time
+
+from pydantic import TypeAdapter
+
+from database import SessionLocal
+from models.destination import Destination, DestinationResponse
+from models.package import Package, PackageResponse, package_load_options
+from utils.catalog_version import get_catalog_version, on_catalog_change
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel: l'instantané est alors désactivé
+    np = None
+
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "0") == "1"
+
+logger = logging.getLogger("travel_api")
+
+
+class TableSnapshot:
+    """
+    Une table du catalogue: ids, colonnes, permutations de tri et éléments JSON,
+    dans l'ordre des ids.
+    """
+
+    def __init__(self, objects, response_model, numeric=(), categorical=(), sorts=()):
+        self.size = len(objects)
+        self.ids = np.fromiter((o.id for o in objects), dtype=np.int64, count=self.size)
+        self.numeric = {
+            name: np.array([getattr(o, name) for o in objects], dtype=np.float64)
+            for name in numeric
+        }
+        self.categories = {}
+        self.codes = {}
+        for name in categorical:
+            values = [getattr(o, name) for o in objects]
+            categories = sorted({v for v in values if v is not None})
+            lookup = {v: i for i, v in enumerate(categories)}
+            self.categories[name] = lookup
+            self.codes[name] = np.fromiter((lookup.get(v, -1) for v in values), dtype=np.int32, count=self.size)
+        adapter = TypeAdapter(response_model)
+        self.items = [adapter.dump_json(adapter.validate_python(o, from_attributes=True)) for o in objects]
+
+        # (colonne, décroissant) -> permutation des lignes, id en départage
+        self.orders = {}
+        for name in sorts:
+            key = self._sort_key(name, [getattr(o, name) for o in objects])
+            self.orders[(name, False)] = np.lexsort((self.ids, key))
+            self.orders[(name, True)] = np.lexsort((-self.ids, -key))
+
+    def _sort_key(self, name, values):
+        if name in self.numeric:
+            # NULL en tête en ordre croissant, comme SQLite
+            return np.where(np.isnan(self.numeric[name]), -np.inf, self.numeric[name])
+        # Texte: rang dans l'ordre binaire (celui de SQLite), NULL en tête
+        ranked = sorted(range(self.size), key=lambda i: (values[i] is not None, values[i] or ""))
+        rank = np.empty(self.size, dtype=np.int64)
+        rank[ranked] = np.arange(self.size)
+        return rank
+
+    def mask(self):
+        return np.ones(self.size, dtype=bool)
+
+    def isin(self, mask, name, values):
+        lookup = self.categories[name]
+        codes = [lookup[v] for v in values if v in lookup]
+        return mask & np.isin(self.codes[name], codes)
+
+    def page(self, mask, sort=None, skip=0, limit=100) -> bytes:
+        """
+        Corps JSON de la page [skip, skip + limit) des lignes du masque, triées
+        selon `sort` = (colonne, décroissant), ou par id.
+        """
+        if sort is None:
+            positions = np.flatnonzero(mask)
+        else:
+            order = self.orders[sort]
+            positions = order[mask[order]]
+        positions = positions[max(skip, 0):max(skip, 0) + max(limit, 0)]
+        return b"[" + b",".join(self.items[i] for i in positions) + b"]"
+
+
+class CatalogSnapshot:
+    def __init__(self, version: int, destinations: TableSnapshot, packages: TableSnapshot, build_seconds: float):
+        self.version = version
+        self.destinations = destinations
+        self.packages = packages
+        self.build_seconds = build_seconds
+
+    def destination_page(self, continent=None, price_category=None, min_rating=None, sort=None, skip=0, limit=100):
+        table = self.destinations
+        mask = table.mask()
+        if continent:
+            mask = table.isin(mask, "continent", continent)
+        if price_category:
+            mask = table.isin(mask, "price_category", price_category)
+        if min_rating is not None:
+            mask &= table.numeric["rating"] >= min_rating
+        return table.page(mask, sort, skip, limit)
+
+    def package_page(self, min_price=None, max_price=None, min_duration=None, sort=None, skip=0, limit=100):
+        table = self.packages
+        mask = table.mask()
+        if min_price is not None:
+            mask &= table.numeric["effective_price"] >= min_price
+        if max_price is not None:
+            mask &= table.numeric["effective_price"] <= max_price
+        if min_duration is not None:
+            mask &= table.numeric["duration"] >= min_duration
+        return table.page(mask, sort, skip, limit)
+
+
+_snapshot = None
+_build_lock = threading.Lock()
+_pending = threading.Event()
+
+
+def build_snapshot() -> CatalogSnapshot:
+    version = get_catalog_version()
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        destinations = db.query(Destination).order_by(Destination.id).all()
+        packages = db.query(Package).options(*package_load_options()).order_by(Package.id).all()
+        snapshot = CatalogSnapshot(
+            version,
+            TableSnapshot(
+                destinations, DestinationResponse,
+                numeric=("rating", "latitude", "longitude"),
+                categorical=("continent", "price_category"),
+                sorts=("rating", "name"),
+            ),
+            TableSnapshot(
+                packages, PackageResponse,
+                numeric=("price", "discount_price", "effective_price", "duration"),
+                sorts=("effective_price", "duration", "name"),
+            ),
+            0.0,
+        )
+        # Tri « promoted » (routes/packages.py): promotions d'abord, puis prix payé, puis id
+        table = snapshot.packages
+        promoted = np.fromiter((bool(p.is_promoted) for p in packages), dtype=np.int8, count=table.size)
+        price_key = table._sort_key("effective_price", None)
+        table.orders[("promoted", False)] = np.lexsort((table.ids, price_key, -promoted))
+    finally:
+        db.close()
+    snapshot.build_seconds = time.perf_counter() - start
+    return snapshot
+
+
+def load_catalog_snapshot():
+    """
+    Construit l'instantané de la version courante et le publie.
+    """
+    global _snapshot
+    with _build_lock:
+        _pending.clear()
+        if _snapshot is not None and _snapshot.version == get_catalog_version():
+            return _snapshot
+        snapshot = build_snapshot()
+        # Affectation atomique: les lecteurs voient l'ancien ou le nouveau, jamais un mélange
+        _snapshot = snapshot
+    logger.info(
+        "Instantané du catalogue v%s: %s destinations, %s packages en %.2fs",
+        snapshot.version, snapshot.destinations.size, snapshot.packages.size, snapshot.build_seconds
+    )
+    return snapshot
+
+
+def is_enabled() -> bool:
+    return CATALOG_SNAPSHOT and np is not None
+
+
+def get_snapshot():
+    """
+    Instantané à jour, ou None (désactivé, ou reconstruction en cours).
+    """
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != get_catalog_version():
+        return None
+    return snapshot
+
+
+def _rebuild_in_background(version):
+    if not is_enabled() or _pending.is_set():
+        return
+    # Plusieurs changements rapprochés ne déclenchent qu'une reconstruction
+    _pending.set()
+
+    def _run():
+        try:
+            load_catalog_snapshot()
+        except Exception:
+            _pending.clear()
+            logger.exception("Échec de la construction de l'instantané du catalogue")
+
+    threading.Thread(target=_run, name="catalog-snapshot", daemon=True).start()
+
+
+on_catalog_change(_rebuild_in_background)
@@ -0,0 +1,264 @@
+# utils/catalog_version.py
+"""
+Numéro de version du catalogue (destinations, packages), partagé par tous les
+processus qui utilisent la même base.
+
+La version vit dans la table catalog_version (une seule ligne). Les hooks
+after_insert/after_update/after_delete des modèles surveillés marquent la
+session; au flush, la ligne est incrémentée dans la même transaction que les
+données, et la nouvelle version n'est publiée qu'au commit: aucune lecture
+concurrente ne peut associer des données pas encore validées à la nouvelle
+version. Sous PostgreSQL, le verrou de ligne sérialise les transactions qui
+modifient le catalogue.
+
+Les autres processus (workers, nœuds) relisent la ligne toutes les
+CATALOG_VERSION_POLL_SECONDS secondes (start_catalog_version_poll): leurs
+caches sont invalidés au plus tard après ce délai. Les caches s'abonnent avec
+on_catalog_change(). Les écritures SQL brutes (hors ORM) ne sont pas
+détectées en cours de route: appeler bump_catalog_version() après coup.
+"""
+import hashlib
+import logging
+import os
+import secrets
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, event, func, insert, select, update
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+# 0 désactive la relecture (un seul processus sur la base)
+CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "1"))
+
+logger = logging.getLogger("travel_api")
+
+catalog_versions = Table(
+    "catalog_version", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+    # Tiré à la création de la ligne: une base recréée ne reprend pas les ETags de l'ancienne
+    Column("epoch", String(16), nullable=False),
+    # Empreinte des données au dernier démarrage (modifications hors application)
+    Column("data_hash", String(40), nullable=False),
+    Column("changed_at", DateTime(timezone=True), nullable=False),
+)
+_ROW_ID = 1
+
+_version = 0
+_epoch = "0"
+_changed_at = datetime.now(timezone.utc)
+# Engine de la base partagée, renseigné par seed_catalog_version
+_engine = None
+_lock = threading.Lock()
+_listeners = []
+_watched = set()
+_poll_stop = threading.Event()
+_poll_thread = None
+
+
+def get_catalog_version() -> int:
+    return _version
+
+
+def get_catalog_fingerprint() -> str:
+    """
+    Identifiant stable de l'état du catalogue, utilisable dans un ETag:
+    identique pour tous les processus d'une même base à la même version.
+    """
+    return f"{_epoch}:{_version}"
+
+
+def get_catalog_changed_at() -> datetime:
+    """
+    Date (UTC) de la dernière modification connue du catalogue.
+    """
+    return _changed_at
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite renvoie des dates naïves (UTC), PostgreSQL des dates avec décalage
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _data_hash(connection, models):
+    parts, latest = [], None
+    for model in models:
+        row = connection.execute(select(
+            func.count(model.id), func.max(model.id),
+            func.max(model.created_at), func.max(model.updated_at)
+        )).one()
+        parts.append(repr(tuple(row)))
+        for value in row[2:]:
+            if value is not None and (latest is None or _as_utc(value) > latest):
+                latest = _as_utc(value)
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest(), latest
+
+
+def _read_row(connection, for_update=False):
+    query = select(catalog_versions).where(catalog_versions.c.id == _ROW_ID)
+    if for_update:
+        query = query.with_for_update()
+    return connection.execute(query).one_or_none()
+
+
+def _increment(connection, **values):
+    connection.execute(
+        update(catalog_versions).where(catalog_versions.c.id == _ROW_ID)
+        .values(version=catalog_versions.c.version + 1, changed_at=datetime.now(timezone.utc), **values)
+    )
+    row = _read_row(connection)
+    return row.version, row.changed_at
+
+
+def seed_catalog_version(db, *models):
+    """
+    Crée au besoin la ligne catalog_version et charge la version partagée.
+    Si les données ont changé depuis le dernier démarrage sans passer par
+    l'application (nombre de lignes, id max, dernières dates de création et de
+    modification de chaque modèle), la version est incrémentée.
+    """
+    global _engine, _version, _epoch, _changed_at
+    bind = db.get_bind()
+    catalog_versions.create(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        data_hash, latest = _data_hash(conn, models)
+        missing = _read_row(conn) is None
+    if missing:
+        try:
+            with bind.begin() as conn:
+                conn.execute(insert(catalog_versions).values(
+                    id=_ROW_ID, version=0, epoch=secrets.token_hex(8), data_hash=data_hash,
+                    changed_at=latest or datetime.now(timezone.utc),
+                ))
+        except IntegrityError:
+            pass  # Ligne créée en même temps par un autre processus
+    with bind.begin() as conn:
+        row = _read_row(conn, for_update=True)
+        if row.data_hash != data_hash:
+            _increment(conn, data_hash=data_hash)
+            row = _read_row(conn)
+    # Avant le premier appel, aucun cache n'est rempli: pas de notification
+    with _lock:
+        _engine = bind
+        _version, _epoch, _changed_at = row.version, row.epoch, _as_utc(row.changed_at)
+
+
+def _publish(version, changed_at):
+    global _version, _changed_at
+    with _lock:
+        # Commits concurrents ou relecture: la version ne recule jamais
+        if version <= _version:
+            return
+        _version = version
+        _changed_at = _as_utc(changed_at)
+    for callback in list(_listeners):
+        callback(version)
+
+
+def bump_catalog_version():
+    """
+    Nouvelle version du catalogue, par exemple après des écritures SQL brutes.
+    """
+    global _version, _changed_at
+    if _engine is None:
+        # Pas de ligne partagée (seed_catalog_version pas appelé): compteur local
+        with _lock:
+            _version += 1
+            _changed_at = datetime.now(timezone.utc)
+        version = _version
+        for callback in list(_listeners):
+            callback(version)
+        return
+    with _engine.begin() as conn:
+        version, changed_at = _increment(conn)
+    _publish(version, changed_at)
+
+
+def on_catalog_change(callback):
+    """
+    Enregistre une fonction appelée avec la nouvelle version après chaque changement.
+    """
+    _listeners.append(callback)
+    return callback
+
+
+def refresh_catalog_version():
+    """
+    Relit la version partagée et notifie les abonnés si un autre processus l'a changée.
+    """
+    if _engine is None:
+        return
+    with _engine.connect() as conn:
+        row = _read_row(conn)
+    if row is not None:
+        _publish(row.version, row.changed_at)
+
+
+def _poll():
+    while not _poll_stop.wait(CATALOG_VERSION_POLL_SECONDS):
+        try:
+            refresh_catalog_version()
+        except Exception:
+            logger.exception("Échec de la relecture de la version du catalogue")
+
+
+def start_catalog_version_poll():
+    """
+    Relit périodiquement la version partagée, pour voir les écritures des autres processus.
+    """
+    global _poll_thread
+    if _engine is None or CATALOG_VERSION_POLL_SECONDS <= 0 or _poll_thread is not None:
+        return
+    _poll_stop.clear()
+    _poll_thread = threading.Thread(target=_poll, name="catalog-version", daemon=True)
+    _poll_thread.start()
+
+
+def stop_catalog_version_poll():
+    global _poll_thread
+    if _poll_thread is not None:
+        _poll_stop.set()
+        _poll_thread.join()
+        _poll_thread = None
+
+
+def _mark_session(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["catalog_changed"] = True
+
+
+def watch_catalog_models(*models):
+    for model in models:
+        if model in _watched:
+            continue
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, _mark_session)
+        _watched.add(model)
+
+
+@event.listens_for(Session, "after_flush")
+def _increment_in_transaction(session, flush_context):
+    # Une incrémentation par transaction, avec les données modifiées
+    if _engine is None or not session.info.get("catalog_changed") or "catalog_version" in session.info:
+        return
+    session.info["catalog_version"] = _increment(session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    changed = session.info.pop("catalog_changed", False)
+    committed = session.info.pop("catalog_version", None)
+    if committed is not None:
+        _publish(*committed)
+    elif changed:
+        bump_catalog_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("catalog_changed", None)
+    session.info.pop("catalog_version", None)
@@ -0,0 +1,105 @@
+# utils/conditional.py
+"""
+Requêtes HTTP conditionnelles (ETag / Last-Modified / 304).
+
+Les ETags sont forts et calculés sans rendu: à partir de la version d'une
+ligne (updated_at, sinon created_at) pour les pages de détail, ou de
+l'empreinte du catalogue et des paramètres pour les listes. On peut donc
+répondre 304 avant tout rendu Jinja ou sérialisation Pydantic.
+
+Chaque ETag inclut aussi la version de build (utils/build_info.py) et aucun
+Last-Modified n'est antérieur au démarrage du processus: après un
+déploiement, les clients reçoivent le nouveau corps et non un 304.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+from utils.build_info import STARTED_AT, get_build_version
+from utils.catalog_version import get_catalog_fingerprint, get_catalog_changed_at
+
+
+def make_etag(*parts) -> str:
+    parts = (get_build_version(), *parts)
+    digest = hashlib.sha1("|".join(repr(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite renvoie des dates naïves en UTC (CURRENT_TIMESTAMP), PostgreSQL
+    # des dates avec le décalage de la session: format_datetime exige timezone.utc
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def row_validators(kind: str, obj, related=()):
+    """
+    (etag, last_modified) d'une ligne Destination/Package. `related` liste les
+    lignes liées dont le contenu apparaît aussi dans la réponse (ex: les
+    destinations d'un package).
+    """
+    parts, last_modified = [kind], None
+    for row in (obj, *related):
+        version = row.updated_at or row.created_at
+        parts.append((row.id, version.isoformat() if version else None))
+        if version and (last_modified is None or _as_utc(version) > last_modified):
+            last_modified = _as_utc(version)
+    return make_etag(*parts), _not_before_start(last_modified)
+
+
+def catalog_validators(key):
+    """
+    (etag, last_modified) d'une liste, d'après l'état du catalogue.
+    `key` identifie la liste: nom et filtres normalisés (cf. response_cache.make_key).
+    """
+    return make_etag(get_catalog_fingerprint(), key), _not_before_start(get_catalog_changed_at())
+
+
+def _not_before_start(last_modified: datetime = None) -> datetime:
+    # Le code a pu changer au redémarrage: les données ne datent pas la réponse à elles seules
+    if last_modified is None or _as_utc(last_modified) < STARTED_AT:
+        return STARTED_AT
+    return _as_utc(last_modified)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match utilise la comparaison faible: on ignore le préfixe W/
+    candidates = [c.strip() for c in header.split(",")]
+    return any((c[2:] if c.startswith("W/") else c) == etag for c in candidates)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Si If-None-Match est présent, If-Modified-Since est ignoré (RFC 9110)
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since is None:
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def validator_headers(etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: datetime = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def set_validators(response: Response, etag: str, last_modified: datetime = None) -> Response:
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
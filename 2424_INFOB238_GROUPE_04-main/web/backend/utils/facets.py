@@ -0,0 +1,168 @@
+# utils/facets.py
+"""
+Comptes par valeur des filtres des destinations (facettes).
+
+Pour chaque valeur de continent, price_category, activité et palier de note,
+l'index garde l'ensemble des destinations concernées sous forme de bitmap: un
+entier Python dont le bit i correspond à la i-ème destination. Filtrer revient
+à combiner des bitmaps (& et |), compter à int.bit_count(): tous les comptes
+d'une combinaison de filtres se calculent en mémoire, sans GROUP BY.
+
+Les facettes à choix alternatifs sont comptées avec les autres filtres mais
+sans le leur: avec continent=Europe, la liste des continents affiche ce que
+donnerait chaque autre choix. L'index est construit à la première demande
+et reconstruit après chaque changement du catalogue (utils/catalog_version.py).
+"""
+import os
+import threading
+
+from sqlalchemy import select
+
+from database import engine
+from models.destination import Destination
+from utils.catalog_version import get_catalog_version, on_catalog_change
+
+# Paliers de note minimale proposés (filtre min_rating)
+RATING_BUCKETS = (4.5, 4.0, 3.5, 3.0)
+# Nombre maximal d'activités renvoyées, les plus fréquentes d'abord
+FACET_ACTIVITIES_LIMIT = int(os.getenv("FACET_ACTIVITIES_LIMIT", "20"))
+
+FACETS = ("continent", "price_category", "rating", "activities")
+# Facettes à choix alternatifs (OU): comptées sans leur propre filtre.
+# Les activités se cumulent (ET): leur compte inclut les activités déjà choisies.
+DISJUNCTIVE_FACETS = ("continent", "price_category", "rating")
+
+
+def _bitmap(positions, size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+class FacetIndex:
+    def __init__(self, version: int, rows):
+        self.version = version
+        self.ids = [r.id for r in rows]
+        self.size = len(self.ids)
+        self.positions = {destination_id: i for i, destination_id in enumerate(self.ids)}
+        self.all = (1 << self.size) - 1
+
+        values = {"continent": {}, "price_category": {}, "activities": {}}
+        ratings = []
+        for i, r in enumerate(rows):
+            if r.continent:
+                values["continent"].setdefault(r.continent, []).append(i)
+            if r.price_category:
+                values["price_category"].setdefault(r.price_category, []).append(i)
+            for activity in set(r.activities or ()):
+                values["activities"].setdefault(activity, []).append(i)
+            ratings.append(r.rating or 0.0)
+
+        self.bitmaps = {
+            facet: {value: _bitmap(positions, self.size) for value, positions in by_value.items()}
+            for facet, by_value in values.items()
+        }
+        self.ratings = ratings
+        self.bitmaps["rating"] = {
+            str(threshold): _bitmap((i for i, rating in enumerate(ratings) if rating >= threshold), self.size)
+            for threshold in RATING_BUCKETS
+        }
+
+    def ids_bitmap(self, ids) -> int:
+        """Bitmap d'une liste d'ids (résultat d'une recherche plein texte, par ex.)."""
+        return _bitmap((self.positions[i] for i in ids if i in self.positions), self.size)
+
+    def _union(self, facet: str, selected) -> int:
+        bitmaps = self.bitmaps[facet]
+        mask = 0
+        for value in selected:
+            mask |= bitmaps.get(value, 0)
+        return mask
+
+    def _filter_masks(self, continent=None, price_category=None, min_rating=None, activities=None):
+        """Un bitmap par filtre actif: valeurs d'une même facette en OU, activités en ET."""
+        masks = {}
+        if continent:
+            masks["continent"] = self._union("continent", continent)
+        if price_category:
+            masks["price_category"] = self._union("price_category", price_category)
+        if min_rating:
+            masks["rating"] = self._rating_mask(min_rating)
+        if activities:
+            mask = self.all
+            for activity in activities:
+                mask &= self.bitmaps["activities"].get(activity, 0)
+            masks["activities"] = mask
+        return masks
+
+    def _rating_mask(self, min_rating: float) -> int:
+        bucket = self.bitmaps["rating"].get(str(float(min_rating)))
+        if bucket is not None:
+            return bucket
+        # Seuil hors paliers: calculé à la demande (pas conservé)
+        return _bitmap((i for i, rating in enumerate(self.ratings) if rating >= min_rating), self.size)
+
+    def counts(self, base: int = None, **filters) -> dict:
+        """
+        {"total": n, "facets": {facette: {valeur: n}}} pour les filtres donnés,
+        restreints à `base` (bitmap, par ex. les résultats d'une recherche).
+        """
+        base = self.all if base is None else base
+        masks = self._filter_masks(**filters)
+        total = base
+        for mask in masks.values():
+            total &= mask
+
+        facets = {}
+        for facet in FACETS:
+            scope = base
+            for other, mask in masks.items():
+                if other != facet or facet not in DISJUNCTIVE_FACETS:
+                    scope &= mask
+            counts = {value: (scope & bitmap).bit_count() for value, bitmap in self.bitmaps[facet].items()}
+            if facet == "activities":
+                top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:FACET_ACTIVITIES_LIMIT]
+                counts = {value: count for value, count in top if count}
+            elif facet != "rating":
+                counts = dict(sorted(counts.items()))
+            facets[facet] = counts
+        return {"total": total.bit_count(), "facets": facets}
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def get_facet_index() -> FacetIndex:
+    """
+    Index de la version courante du catalogue, construit au premier appel
+    (une requête sur les colonnes utiles, sans charger les objets).
+    """
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _build_lock:
+        if _index is not None and _index.version == version:
+            return _index
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(
+                    Destination.id, Destination.continent, Destination.price_category,
+                    Destination.rating, Destination.activities,
+                ).order_by(Destination.id)
+            ).all()
+        index = FacetIndex(version, rows)
+        if get_catalog_version() == version:
+            _index = index
+    return index
+
+
+def _reset(version):
+    global _index
+    _index = None
+
+
+on_catalog_change(_reset)
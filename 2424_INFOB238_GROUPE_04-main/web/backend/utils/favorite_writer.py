@@ -0,0 +1,138 @@
+# utils/favorite_writer.py
+"""
+Écriture différée (write-behind) des bascules de favoris, optionnelle.
+
+Sur SQLite, chaque commit coûte un fsync, et chaque clic sur un cœur en
+déclenche un. Avec FAVORITES_WRITE_BEHIND=1, POST/DELETE /api/favorites/{id}
+déposent l'opération en mémoire et répondent 202. Les opérations sont
+fusionnées par (utilisateur, destination): seule la dernière compte, donc un
+ajout suivi d'un retrait ne produit au plus qu'un DELETE sans effet. Elles sont
+écrites en une seule transaction toutes les FAVORITES_FLUSH_INTERVAL_MS, ou
+dès que FAVORITES_FLUSH_MAX_ITEMS sont en attente, et à l'arrêt de l'application.
+
+Les lectures du même utilisateur superposent les opérations en attente
+(pending_for), ce qui garantit qu'il voit ses propres écritures. Les autres
+processus ne les voient qu'après l'écriture. Un arrêt brutal du processus
+perd les opérations en attente.
+"""
+import asyncio
+import logging
+import os
+
+from database import AsyncSessionLocal
+from models.favorite import insert_favorites, delete_favorites
+
+FAVORITES_WRITE_BEHIND = os.getenv("FAVORITES_WRITE_BEHIND", "0") == "1"
+FAVORITES_FLUSH_INTERVAL_MS = float(os.getenv("FAVORITES_FLUSH_INTERVAL_MS", "200"))
+FAVORITES_FLUSH_MAX_ITEMS = int(os.getenv("FAVORITES_FLUSH_MAX_ITEMS", "500"))
+
+logger = logging.getLogger("travel_api")
+
+
+class FavoriteWriteBehind:
+    def __init__(self, enabled: bool, interval_ms: float, max_items: int):
+        self.enabled = enabled
+        self.interval = interval_ms / 1000
+        self.max_items = max_items
+        # user_id -> {destination_id: "add" | "remove"}, dans l'ordre des clics
+        self._pending = {}
+        # Lot en cours d'écriture: reste visible pour les lectures jusqu'au commit
+        self._inflight = {}
+        self._size = 0
+        self._task = None
+        self._wakeup = None
+        self._flush_lock = None
+        self.flushes = 0
+        self.operations_written = 0
+        self.operations_coalesced = 0
+
+    @property
+    def pending_count(self) -> int:
+        return self._size
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche d'écriture et écrit tout ce qui reste en attente."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_lock is not None:
+            await self.flush()
+
+    def enqueue(self, user_id: int, destination_id: int, op: str):
+        """Enregistre la dernière opération voulue pour (user_id, destination_id)."""
+        self.start()
+        ops = self._pending.setdefault(user_id, {})
+        if ops.pop(destination_id, None) is not None:
+            self.operations_coalesced += 1
+        else:
+            self._size += 1
+        ops[destination_id] = op
+        if self._size >= self.max_items:
+            self._wakeup.set()
+
+    def pending_for(self, user_id: int) -> dict:
+        """Opérations pas encore validées en base pour cet utilisateur (les plus récentes gagnent)."""
+        merged = dict(self._inflight.get(user_id, {}))
+        for destination_id, op in self._pending.get(user_id, {}).items():
+            merged.pop(destination_id, None)
+            merged[destination_id] = op
+        return merged
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Le lot a été remis en attente par flush(): nouvel essai au prochain tour
+                logger.exception("Échec de l'écriture groupée des favoris")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending, self._size = self._pending, {}, 0
+            self._inflight = batch
+            try:
+                async with AsyncSessionLocal() as db:
+                    for user_id, ops in batch.items():
+                        removes = [d for d, op in ops.items() if op == "remove"]
+                        adds = [d for d, op in ops.items() if op == "add"]
+                        if removes:
+                            await delete_favorites(db, user_id, removes)
+                        if adds:
+                            await insert_favorites(db, user_id, adds)
+                    await db.commit()
+            except Exception:
+                # Remettre le lot sous les opérations arrivées entre-temps (plus récentes)
+                for user_id, ops in batch.items():
+                    newer = self._pending.get(user_id, {})
+                    for destination_id, op in ops.items():
+                        if destination_id not in newer:
+                            self._size += 1
+                    self._pending[user_id] = {**ops, **newer}
+                raise
+            finally:
+                self._inflight = {}
+            self.flushes += 1
+            self.operations_written += sum(len(ops) for ops in batch.values())
+
+
+favorite_writer = FavoriteWriteBehind(
+    FAVORITES_WRITE_BEHIND, FAVORITES_FLUSH_INTERVAL_MS, FAVORITES_FLUSH_MAX_ITEMS
+)
@@ -0,0 +1,199 @@
+# utils/geo_index.py
+"""
+Index spatial des destinations et recherche « à proximité ».
+
+Destination.coordinates ({lat, lng}, JSON) est recopié dans les colonnes
+numériques latitude/longitude (models/destination.py, sync_coordinates).
+Sous SQLite, une table virtuelle R*Tree (destinations_rtree, un point par
+destination) est tenue à jour par des triggers, comme l'index FTS5 de
+utils/search_index.py. Ailleurs, l'index B-tree (latitude, longitude) sert.
+
+Une recherche dans un rayon se fait en deux temps: la base ne renvoie que les
+points des rectangles englobant le cercle (id, latitude, longitude, sans
+charger les objets), puis la distance exacte (haversine) est calculée en une
+fois sur ces candidats avec NumPy, et seuls les `limit` plus proches sont gardés.
+"""
+import math
+
+from sqlalchemy import and_, bindparam, column, or_, select, table, text, update
+
+from models.destination import Destination
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel: calcul ligne par ligne
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+RTREE_TABLE = "destinations_rtree"
+
+# Renseigné par ensure_geo_index, False tant que le R*Tree n'est pas disponible
+_rtree_enabled = False
+
+_rtree = table(RTREE_TABLE, column("id"), column("min_lat"), column("max_lat"), column("min_lng"), column("max_lng"))
+
+
+def _create_statements():
+    point = "new.id, new.latitude, new.latitude, new.longitude, new.longitude"
+    not_null = "new.latitude IS NOT NULL AND new.longitude IS NOT NULL"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+        f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ai AFTER INSERT ON destinations WHEN {not_null} BEGIN "
+        f"INSERT INTO {RTREE_TABLE} VALUES ({point}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ad AFTER DELETE ON destinations BEGIN "
+        f"DELETE FROM {RTREE_TABLE} WHERE id = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_au AFTER UPDATE OF id, latitude, longitude ON destinations BEGIN "
+        f"DELETE FROM {RTREE_TABLE} WHERE id = old.id; "
+        f"INSERT INTO {RTREE_TABLE} SELECT {point} WHERE {not_null}; END",
+    ]
+
+
+def backfill_coordinates(conn):
+    """
+    Renseigne latitude/longitude des lignes écrites avant l'ajout des colonnes.
+    """
+    rows = conn.execute(
+        select(Destination.id, Destination.coordinates)
+        .where(Destination.latitude.is_(None), Destination.coordinates.is_not(None))
+    ).all()
+    values = []
+    for destination_id, coordinates in rows:
+        try:
+            values.append({"pk": destination_id, "lat": float(coordinates["lat"]), "lng": float(coordinates["lng"])})
+        except (TypeError, KeyError, ValueError):
+            continue
+    if values:
+        conn.execute(
+            update(Destination.__table__)
+            .where(Destination.__table__.c.id == bindparam("pk"))
+            .values(latitude=bindparam("lat"), longitude=bindparam("lng")),
+            values,
+        )
+    return len(values)
+
+
+def ensure_geo_index(engine):
+    """
+    Complète latitude/longitude, puis, sous SQLite, crée le R*Tree et ses
+    triggers et le remplit lors de la première création.
+    Sans R*Tree, les recherches passent par l'index (latitude, longitude).
+    """
+    global _rtree_enabled
+    with engine.begin() as conn:
+        backfill_coordinates(conn)
+
+    if engine.dialect.name != "sqlite":
+        _rtree_enabled = False
+        return False
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": RTREE_TABLE},
+        ).first()
+        for statement in _create_statements():
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text(
+                f"INSERT INTO {RTREE_TABLE} SELECT id, latitude, latitude, longitude, longitude "
+                f"FROM destinations WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+            ))
+
+    _rtree_enabled = True
+    return True
+
+
+def bounding_boxes(lat: float, lng: float, radius_km: float):
+    """
+    Rectangles (min_lat, max_lat, min_lng, max_lng) qui couvrent le cercle.
+    Deux rectangles si le cercle traverse l'antiméridien, toutes les
+    longitudes s'il contient un pôle.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    # Écart de longitude maximal, atteint aux points tangents du cercle
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    delta_lng = math.degrees(math.asin(ratio))
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+    if min_lng < -180:
+        return [(min_lat, max_lat, min_lng + 360, 180.0), (min_lat, max_lat, -180.0, max_lng)]
+    if max_lng > 180:
+        return [(min_lat, max_lat, min_lng, 180.0), (min_lat, max_lat, -180.0, max_lng - 360)]
+    return [(min_lat, max_lat, min_lng, max_lng)]
+
+
+def candidates_query(lat: float, lng: float, radius_km: float):
+    """
+    SELECT id, latitude, longitude des destinations dans les rectangles englobants.
+    """
+    query = select(Destination.id, Destination.latitude, Destination.longitude)
+    boxes = bounding_boxes(lat, lng, radius_km)
+    if _rtree_enabled:
+        # Le R*Tree stocke des flottants 32 bits arrondis vers l'extérieur:
+        # il peut renvoyer quelques points en trop, jamais en moins
+        conditions = [
+            and_(_rtree.c.max_lat >= min_lat, _rtree.c.min_lat <= max_lat,
+                 _rtree.c.max_lng >= min_lng, _rtree.c.min_lng <= max_lng)
+            for min_lat, max_lat, min_lng, max_lng in boxes
+        ]
+        return query.join(_rtree, _rtree.c.id == Destination.id).where(or_(*conditions))
+    conditions = [
+        and_(Destination.latitude.between(min_lat, max_lat), Destination.longitude.between(min_lng, max_lng))
+        for min_lat, max_lat, min_lng, max_lng in boxes
+    ]
+    return query.where(or_(*conditions))
+
+
+def haversine_km(lat: float, lng: float, lats, lngs):
+    """
+    Distances (km) du point (lat, lng) à chacun des points (lats[i], lngs[i]).
+    Tableaux NumPy en entrée et en sortie si NumPy est installé, listes sinon.
+    """
+    if np is not None:
+        phi1, phi2 = math.radians(lat), np.radians(lats)
+        d_phi = phi2 - phi1
+        d_lambda = np.radians(lngs) - math.radians(lng)
+        a = np.sin(d_phi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    phi1 = math.radians(lat)
+    distances = []
+    for point_lat, point_lng in zip(lats, lngs):
+        phi2 = math.radians(point_lat)
+        a = (math.sin((phi2 - phi1) / 2) ** 2
+             + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(point_lng - lng) / 2) ** 2)
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return distances
+
+
+def nearest(rows, lat: float, lng: float, radius_km: float, limit: int):
+    """
+    Parmi les lignes (id, latitude, longitude), les `limit` plus proches à moins
+    de `radius_km`, sous forme de liste [(id, distance_km)] par distance croissante.
+    """
+    if not rows:
+        return []
+    ids, lats, lngs = zip(*rows)
+
+    if np is None:
+        distances = haversine_km(lat, lng, lats, lngs)
+        within = sorted((d, i) for i, d in zip(ids, distances) if d <= radius_km)
+        return [(i, d) for d, i in within[:limit]]
+
+    ids = np.fromiter(ids, dtype=np.int64, count=len(rows))
+    distances = haversine_km(
+        lat, lng, np.fromiter(lats, dtype=np.float64, count=len(rows)), np.fromiter(lngs, dtype=np.float64, count=len(rows))
+    )
+    within = np.flatnonzero(distances <= radius_km)
+    if len(within) > limit:
+        # Sélection partielle en O(n), seul le résultat est trié
+        within = within[np.argpartition(distances[within], limit - 1)[:limit]]
+    within = within[np.lexsort((ids[within], distances[within]))]
+    return [(int(ids[i]), float(distances[i])) for i in within]
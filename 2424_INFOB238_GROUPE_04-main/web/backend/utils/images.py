@@ -0,0 +1,245 @@
+# utils/images.py
+"""
+Déclinaisons responsives des photos du catalogue (AVIF / WebP / JPEG).
+
+Les photos de static/images sont servies en pleine taille alors que les
+cartes n'affichent que des vignettes. /img/{largeur}/{format}/{chemin} produit
+à la première demande une version réduite, gardée sur disque dans
+IMAGE_CACHE_DIR. Les largeurs sont limitées à IMAGE_WIDTHS (une largeur
+quelconque est arrondie au palier supérieur), ce qui borne le nombre de
+déclinaisons. Le cache est borné en octets: les fichiers les moins récemment
+servis sont supprimés en premier (la date de modification sert de date d'accès).
+
+Le helper Jinja responsive_image() produit un <picture> avec srcset pour chaque
+format. Sans Pillow, il renvoie simplement l'image d'origine.
+"""
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request
+from markupsafe import Markup, escape
+from starlette.responses import FileResponse, Response
+
+from utils.conditional import is_not_modified
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow est optionnel: pas de déclinaisons
+    Image = features = None
+
+STATIC_IMAGES_DIR = "./static/images"
+STATIC_IMAGES_URL = "/static/images/"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "./image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_WIDTHS", "320,480,640,960,1280").split(","))
+IMAGE_QUALITY = {"avif": 50, "webp": 75, "jpeg": 80}
+IMAGE_CACHE_CONTROL = "public, max-age=86400"
+
+# format -> (format Pillow, extension, type MIME)
+FORMATS = {
+    "avif": ("AVIF", ".avif", "image/avif"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+_cache_size = 0
+_cache_lock = threading.Lock()
+# Un verrou par déclinaison: deux requêtes simultanées n'encodent pas deux fois
+_render_locks = {}
+
+
+@lru_cache(maxsize=None)
+def available_formats():
+    if Image is None:
+        return ()
+    return tuple(fmt for fmt in ("avif", "webp") if features.check(fmt)) + ("jpeg",)
+
+
+def _source_file(path: str) -> str:
+    """
+    Fichier source d'un chemin relatif à static/images, sans sortir du répertoire.
+    """
+    root = os.path.realpath(STATIC_IMAGES_DIR)
+    source = os.path.realpath(os.path.join(root, path))
+    if not source.startswith(root + os.sep) or not source.lower().endswith(SOURCE_EXTENSIONS):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    if not os.path.isfile(source):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    return source
+
+
+def snap_width(width: int) -> int:
+    for bucket in IMAGE_WIDTHS:
+        if width <= bucket:
+            return bucket
+    return IMAGE_WIDTHS[-1]
+
+
+@lru_cache(maxsize=1024)
+def _source_width(source: str, mtime: float) -> int:
+    # Pillow ne lit que l'en-tête du fichier
+    with Image.open(source) as img:
+        return img.width
+
+
+def _derivative_name(source: str, width: int, fmt: str) -> str:
+    stat = os.stat(source)
+    key = f"{source}|{stat.st_mtime_ns}|{stat.st_size}|{width}|{IMAGE_QUALITY[fmt]}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest}{FORMATS[fmt][1]}"
+
+
+def _scan_cache():
+    global _cache_size
+    total = 0
+    for root, _, names in os.walk(IMAGE_CACHE_DIR):
+        for name in names:
+            total += os.path.getsize(os.path.join(root, name))
+    _cache_size = total
+
+
+def _evict():
+    """
+    Supprime les déclinaisons les moins récemment servies jusqu'à 90 % de la limite.
+    """
+    global _cache_size
+    files = []
+    for root, _, names in os.walk(IMAGE_CACHE_DIR):
+        for name in names:
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            files.append((stat.st_mtime, stat.st_size, file_path))
+    files.sort()
+    target = IMAGE_CACHE_MAX_BYTES * 0.9
+    total = sum(size for _, size, _ in files)
+    for _, size, file_path in files:
+        if total <= target:
+            break
+        try:
+            os.remove(file_path)
+            total -= size
+        except FileNotFoundError:
+            pass
+    _cache_size = total
+
+
+def _render(source: str, width: int, fmt: str, file_path: str):
+    global _cache_size
+    pil_format = FORMATS[fmt][0]
+    with Image.open(source) as img:
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, pil_format, quality=IMAGE_QUALITY[fmt], optimize=pil_format == "JPEG")
+    os.replace(tmp_path, file_path)
+    with _cache_lock:
+        _cache_size += os.path.getsize(file_path)
+        if _cache_size > IMAGE_CACHE_MAX_BYTES:
+            _evict()
+
+
+def derivative(path: str, width: int, fmt: str) -> str:
+    """
+    Chemin sur disque de la déclinaison (largeur, format) de static/images/{path},
+    générée si besoin.
+    """
+    if fmt not in available_formats():
+        raise HTTPException(status_code=404, detail="Format non disponible")
+    source = _source_file(path)
+    width = snap_width(width)
+    file_path = os.path.join(IMAGE_CACHE_DIR, _derivative_name(source, width, fmt))
+
+    if not os.path.exists(file_path):
+        with _cache_lock:
+            lock = _render_locks.setdefault(file_path, threading.Lock())
+        with lock:
+            if not os.path.exists(file_path):
+                _render(source, width, fmt, file_path)
+        with _cache_lock:
+            _render_locks.pop(file_path, None)
+    else:
+        # Marque l'accès pour l'éviction LRU
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            return derivative(path, width, fmt)
+    return file_path
+
+
+def image_response(request: Request, path: str, width: int, fmt: str) -> Response:
+    file_path = derivative(path, width, fmt)
+    etag = f'"{os.path.splitext(os.path.basename(file_path))[0][:20]}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(file_path, media_type=FORMATS[fmt][2], headers=headers)
+
+
+def image_srcset(image_url: str, fmt: str) -> str:
+    """
+    Helper Jinja: srcset des déclinaisons d'une image de static/images, jusqu'à
+    la largeur de l'original. Chaîne vide si aucune déclinaison.
+    """
+    if not image_url or not image_url.startswith(STATIC_IMAGES_URL) or fmt not in available_formats():
+        return ""
+    path = image_url[len(STATIC_IMAGES_URL):]
+    url_path = quote(path)
+    try:
+        source = _source_file(path)
+        source_width = _source_width(source, os.path.getmtime(source))
+    except (HTTPException, OSError):
+        return ""
+    candidates = [(w, w) for w in IMAGE_WIDTHS if w < source_width]
+    # Pleine largeur: le palier au-dessus, qui n'agrandit jamais l'original
+    candidates.append((snap_width(source_width), min(source_width, IMAGE_WIDTHS[-1])))
+    return ", ".join(f"/img/{w}/{fmt}/{url_path} {descriptor}w" for w, descriptor in candidates)
+
+
+def responsive_image(image_url: str, alt: str, sizes: str, fallback_url: str = None) -> Markup:
+    """
+    Helper Jinja: <picture> avec une source AVIF/WebP et un <img> JPEG en srcset.
+    """
+    onerror = f' onerror="this.onerror=null;this.src=\'{escape(fallback_url)}\'"' if fallback_url else ""
+    img_srcset = image_srcset(image_url, "jpeg")
+    img = (
+        f'<img src="{escape(image_url)}"'
+        + (f' srcset="{img_srcset}" sizes="{escape(sizes)}"' if img_srcset else "")
+        + f' alt="{escape(alt)}" loading="lazy" decoding="async"{onerror}>'
+    )
+    sources = []
+    for fmt in ("avif", "webp"):
+        srcset = image_srcset(image_url, fmt)
+        if srcset:
+            sources.append(f'<source type="{FORMATS[fmt][2]}" srcset="{srcset}" sizes="{escape(sizes)}">')
+    return Markup(f'<picture>{"".join(sources)}{img}</picture>')
+
+
+def generate_all(formats=None):
+    """
+    Génère toutes les déclinaisons à l'avance (appelé par build_assets.py).
+    """
+    count = 0
+    for root, _, names in os.walk(STATIC_IMAGES_DIR):
+        for name in names:
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.relpath(os.path.join(root, name), STATIC_IMAGES_DIR).replace(os.sep, "/")
+            source = _source_file(path)
+            source_width = _source_width(source, os.path.getmtime(source))
+            for fmt in formats or available_formats():
+                for width in IMAGE_WIDTHS:
+                    if width < source_width or width == snap_width(source_width):
+                        derivative(path, width, fmt)
+                        count += 1
+    return count
+
+
+os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+_scan_cache()
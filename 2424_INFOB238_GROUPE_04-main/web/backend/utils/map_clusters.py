@@ -0,0 +1,192 @@
+# utils/map_clusters.py
+"""
+Regroupement des destinations pour la carte (GET /api/destinations/map).
+
+Les points sont projetés une fois en Web Mercator (coordonnées dans [0, 1]).
+Pour un niveau de zoom z, la carte mesure TILE_SIZE * 2**z pixels de large:
+les points d'une même case de grille de MAP_CLUSTER_RADIUS_PX pixels forment
+un groupe, placé au barycentre de ses points. Chaque niveau est calculé à la
+première demande puis gardé, jusqu'au prochain changement du catalogue
+(utils/catalog_version.py). Une réponse ne contient qu'un élément par case
+visible, quelle que soit la taille du catalogue. Au-delà de
+MAP_CLUSTER_MAX_ZOOM, les points sont renvoyés un par un.
+"""
+import math
+import os
+import threading
+
+from sqlalchemy import select
+
+from models.destination import Destination
+from utils.catalog_version import get_catalog_version, on_catalog_change
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel: regroupement ligne par ligne
+    np = None
+
+MAP_CLUSTER_RADIUS_PX = int(os.getenv("MAP_CLUSTER_RADIUS_PX", "60"))
+MAP_CLUSTER_MAX_ZOOM = int(os.getenv("MAP_CLUSTER_MAX_ZOOM", "16"))
+TILE_SIZE = 256
+# Limite de la projection Web Mercator
+MAX_LATITUDE = 85.05112878
+
+
+def mercator_x(lng):
+    return lng / 360 + 0.5
+
+
+def mercator_y(lat):
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    return 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+
+
+def _longitude(x):
+    return (x - 0.5) * 360
+
+
+def _latitude(y):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+class ClusterIndex:
+    """
+    Points du catalogue pour une version donnée, et groupes calculés par zoom.
+    Un niveau est un tuple (x, y, count, member): `member` est l'indice d'un
+    point du groupe, qui suffit à décrire les groupes d'un seul point.
+    """
+
+    def __init__(self, version: int, rows):
+        self.version = version
+        rows = [r for r in rows if r.latitude is not None and r.longitude is not None]
+        self.ids = [r.id for r in rows]
+        self.names = [r.name for r in rows]
+        self.continents = [r.continent for r in rows]
+        lngs = [r.longitude for r in rows]
+        lats = [r.latitude for r in rows]
+        if np is not None:
+            sin = np.sin(np.radians(np.clip(np.array(lats, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE)))
+            self.x = np.array(lngs, dtype=np.float64) / 360 + 0.5
+            self.y = 0.5 - 0.25 * np.log((1 + sin) / (1 - sin)) / math.pi
+        else:
+            self.x = [mercator_x(lng) for lng in lngs]
+            self.y = [mercator_y(lat) for lat in lats]
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def has_level(self, zoom: int) -> bool:
+        return min(zoom, MAP_CLUSTER_MAX_ZOOM + 1) in self._levels
+
+    def level(self, zoom: int):
+        zoom = min(zoom, MAP_CLUSTER_MAX_ZOOM + 1)
+        level = self._levels.get(zoom)
+        if level is None:
+            with self._lock:
+                level = self._levels.get(zoom)
+                if level is None:
+                    level = self._levels[zoom] = self._cluster(zoom)
+        return level
+
+    def _cluster(self, zoom: int):
+        if zoom > MAP_CLUSTER_MAX_ZOOM:
+            # Points isolés
+            if np is not None:
+                return self.x, self.y, np.ones(len(self.ids), dtype=np.int64), np.arange(len(self.ids))
+            return self.x, self.y, [1] * len(self.ids), list(range(len(self.ids)))
+        cell = MAP_CLUSTER_RADIUS_PX / (TILE_SIZE * 2 ** zoom)
+        cells_per_row = math.ceil(1 / cell) + 1
+        if np is not None:
+            keys = np.floor(self.x / cell).astype(np.int64) * cells_per_row + np.floor(self.y / cell).astype(np.int64)
+            _, member, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            count = np.bincount(inverse)
+            x = np.bincount(inverse, weights=self.x) / count
+            y = np.bincount(inverse, weights=self.y) / count
+            return x, y, count, member
+
+        groups = {}
+        for i, (px, py) in enumerate(zip(self.x, self.y)):
+            key = (math.floor(px / cell), math.floor(py / cell))
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [px, py, 1, i]
+            else:
+                group[0] += px
+                group[1] += py
+                group[2] += 1
+        values = list(groups.values())
+        return (
+            [g[0] / g[2] for g in values], [g[1] / g[2] for g in values],
+            [g[2] for g in values], [g[3] for g in values],
+        )
+
+    def features(self, zoom: int, west: float, south: float, east: float, north: float):
+        """
+        Features GeoJSON (groupes et points isolés) du niveau `zoom` dans la
+        zone; west > east si la zone traverse l'antiméridien.
+        """
+        x, y, count, member = self.level(zoom)
+        min_x, max_x = mercator_x(west), mercator_x(east)
+        min_y, max_y = mercator_y(north), mercator_y(south)
+        if np is not None:
+            in_x = (x >= min_x) & (x <= max_x) if west <= east else (x >= min_x) | (x <= max_x)
+            visible = np.flatnonzero(in_x & (y >= min_y) & (y <= max_y))
+            # Seuls les éléments visibles repassent en objets Python
+            x, y, count, member = x[visible].tolist(), y[visible].tolist(), count[visible].tolist(), member[visible].tolist()
+        else:
+            visible = [
+                i for i in range(len(x))
+                if (min_x <= x[i] <= max_x if west <= east else (x[i] >= min_x or x[i] <= max_x))
+                and min_y <= y[i] <= max_y
+            ]
+            x, y, count, member = [x[i] for i in visible], [y[i] for i in visible], [count[i] for i in visible], [member[i] for i in visible]
+
+        features = []
+        for i in range(len(x)):
+            if count[i] == 1:
+                point = member[i]
+                geometry = [_longitude(self.x[point]), _latitude(self.y[point])]
+                properties = {
+                    "cluster": False, "id": self.ids[point],
+                    "name": self.names[point], "continent": self.continents[point],
+                }
+            else:
+                geometry = [_longitude(x[i]), _latitude(y[i])]
+                properties = {
+                    "cluster": True, "point_count": count[i],
+                    "expansion_zoom": min(zoom + 1, MAP_CLUSTER_MAX_ZOOM + 1),
+                }
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [round(geometry[0], 6), round(geometry[1], 6)]},
+                "properties": properties,
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+
+_index = None
+
+
+async def get_cluster_index(db) -> ClusterIndex:
+    """
+    Index de la version courante du catalogue, construit au premier appel.
+    """
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        result = await db.execute(
+            select(Destination.id, Destination.name, Destination.continent, Destination.latitude, Destination.longitude)
+        )
+        index = ClusterIndex(version, result.all())
+        if get_catalog_version() == version:
+            _index = index
+    return index
+
+
+def _reset(version):
+    global _index
+    _index = None
+
+
+on_catalog_change(_reset)
@@ -0,0 +1,214 @@
+# utils/metrics.py
+"""
+Métriques au format texte Prometheus, sans dépendance externe.
+
+Chaque métrique a son propre verrou, tenu seulement le temps d'incrémenter
+quelques nombres: le coût par requête reste de l'ordre de la microseconde.
+Les libellés de route utilisent le modèle de chemin FastAPI
+(/api/destinations/{destination_id}) pour borner la cardinalité.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount=1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # Compteurs par tranche (non cumulés); le cumul est fait à l'export
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def register_collector(callback):
+    """
+    `callback()` renvoie des lignes au format texte, ajoutées à chaque export
+    (pour exposer des statistiques tenues ailleurs, ex: pool bcrypt).
+    """
+    _collectors.append(callback)
+    return callback
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for callback in _collectors:
+        lines.extend(callback())
+    return "\n".join(lines) + "\n"
+
+
+# ==================== MÉTRIQUES DE L'APPLICATION ====================
+
+http_requests_total = Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+)
+http_request_errors_total = Counter(
+    "http_request_errors_total", "Requêtes HTTP en erreur (5xx ou exception)", ("method", "route")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Durée de traitement des requêtes HTTP", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requêtes HTTP en cours de traitement"
+)
+db_pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds", "Attente pour obtenir une connexion SQLAlchemy (Engine.connect)", ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+db_queries_total = Counter(
+    "db_queries_total", "Requêtes SQL exécutées", ("engine",)
+)
+template_render_seconds = Histogram(
+    "template_render_seconds", "Durée de rendu des templates Jinja", ("template",)
+)
+
+
+def route_label(request) -> str:
+    """
+    Modèle de chemin de la route (jamais l'URL brute, pour borner la cardinalité).
+    """
+    route = request.scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if request.url.path.startswith("/static/"):
+        return "/static/{path}"
+    return "<unmatched>"
+
+
+def instrument_engine(engine, name: str):
+    """
+    Compte les requêtes SQL et mesure l'obtention d'une connexion.
+    Accepte un engine synchrone ou asynchrone.
+
+    L'attente est mesurée autour de Engine.connect(), par où passent les
+    sessions, engine.begin() et les engines asynchrones: attente au checkout
+    du pool, ouverture éventuelle d'une connexion et pré-ping compris. La
+    mesure est posée sur l'engine et non sur le pool, qu'engine.dispose()
+    ou pool.recreate() remplacent.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        db_queries_total.inc(name)
+
+    connect = sync_engine.connect
+
+    def _timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - start, name)
+
+    sync_engine.connect = _timed_connect
+
+
+def instrument_templates(templates):
+    """
+    Mesure le rendu des templates: Starlette rend le template dans TemplateResponse.
+    """
+    template_response = templates.TemplateResponse
+
+    def _timed_template_response(name, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return template_response(name, *args, **kwargs)
+        finally:
+            template_render_seconds.observe(time.perf_counter() - start, name)
+
+    templates.TemplateResponse = _timed_template_response
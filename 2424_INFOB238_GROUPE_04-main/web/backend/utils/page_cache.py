@@ -0,0 +1,65 @@
+# utils/page_cache.py
+"""
+Cache des pages HTML publiques (accueil, listes, pages de détail).
+
+Le rendu Jinja d'une page ne dépend que du template, de l'état du catalogue
+et des filtres: il est identique pour tous les visiteurs. On garde le HTML
+rendu, et une variante gzip précompressée, sous la clé
+(template, version du catalogue, filtres normalisés) de response_cache.make_key.
+Le cache est vidé à chaque changement du catalogue, et réchauffé au
+démarrage par main.warm_page_cache().
+"""
+import gzip
+import os
+
+from fastapi import Request, Response
+
+from utils.catalog_version import on_catalog_change
+from utils.conditional import validator_headers
+from utils.response_cache import ResponseCache
+
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+PAGE_CACHE_GZIP = os.getenv("PAGE_CACHE_GZIP", "1") == "1"
+PAGE_CACHE_GZIP_LEVEL = int(os.getenv("PAGE_CACHE_GZIP_LEVEL", "6"))
+# En dessous, gzip ne fait presque rien gagner
+PAGE_CACHE_GZIP_MIN_BYTES = int(os.getenv("PAGE_CACHE_GZIP_MIN_BYTES", "1024"))
+
+page_cache = ResponseCache(PAGE_CACHE_MAX_BYTES)
+on_catalog_change(lambda version: page_cache.clear())
+
+
+def store_page(key, html: str, etag: str = None, last_modified=None):
+    """
+    Met en cache une page rendue et renvoie l'entrée (CachedResponse).
+    """
+    body = html.encode("utf-8")
+    gzip_body = None
+    if PAGE_CACHE_GZIP and len(body) >= PAGE_CACHE_GZIP_MIN_BYTES:
+        gzip_body = gzip.compress(body, compresslevel=PAGE_CACHE_GZIP_LEVEL, mtime=0)
+    return page_cache.set(key, body, etag, last_modified, gzip_body)
+
+
+def accepts_encoding(request: Request, encoding: str) -> bool:
+    """
+    Vrai si Accept-Encoding autorise `encoding` (ex: "gzip", "br").
+    """
+    accept = request.headers.get("accept-encoding", "")
+    for coding in accept.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def page_response(request: Request, entry) -> Response:
+    """
+    Réponse HTML depuis une entrée du cache, compressée si le client accepte gzip.
+    """
+    headers = validator_headers(entry.etag, entry.last_modified) if entry.etag else {}
+    body = entry.body
+    if entry.gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_encoding(request, "gzip"):
+            body = entry.gzip_body
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
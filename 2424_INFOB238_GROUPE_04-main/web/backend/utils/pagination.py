@@ -0,0 +1,149 @@
+# utils/pagination.py
+"""
+Pagination par curseur (keyset) pour les listes de l'API.
+
+Au lieu de OFFSET, qui relit toutes les lignes des pages précédentes, on
+reprend après le dernier couple (clé de tri, id) renvoyé. Le curseur est
+opaque pour le client: c'est ce couple encodé en base64 avec le tri utilisé
+(une clé NULL y est encodée par null).
+
+Les NULL sont placés comme SQLite le fait par défaut, quel que soit le
+backend: en tête en ordre croissant, en fin en ordre décroissant.
+"""
+import base64
+import json
+import os
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, literal, select, tuple_
+
+# Taille maximale d'une page des listes de l'API (paramètre limit)
+MAX_PAGE_LIMIT = int(os.getenv("MAX_PAGE_LIMIT", "1000"))
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    if not isinstance(data, dict) or not isinstance(data.get("key"), list) or len(data["key"]) != 2:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    return data
+
+
+def _matches_column(column, value) -> bool:
+    """
+    Vrai si `value` (décodée du JSON d'un curseur) a le type de `column`:
+    un curseur modifié doit donner une 400, pas une erreur de la base.
+    """
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return True
+    if isinstance(value, bool):
+        return expected is bool
+    if expected in (int, float):
+        return isinstance(value, int) or (expected is float and isinstance(value, float))
+    return isinstance(value, expected)
+
+
+def resolve_sort(sorts: dict, sort: str):
+    """
+    Retourne (colonne, décroissant) pour un nom de tri exposé à l'API.
+    """
+    if sort not in sorts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tri inconnu, valeurs possibles: {', '.join(sorts)}"
+        )
+    return sorts[sort]
+
+
+def apply_sort(query, sort_column, id_column, descending):
+    """
+    Ordre total (clé de tri, id): l'id départage les ex-aequo pour que
+    l'ordre soit stable d'une page à l'autre.
+    """
+    if descending:
+        return query.order_by(sort_column.desc().nulls_last(), id_column.desc())
+    return query.order_by(sort_column.asc().nulls_first(), id_column.asc())
+
+
+def _remaining_segments(sort_column, id_column, descending, last_value, last_id):
+    """
+    Conditions des lignes qui suivent (last_value, last_id), par segment dans
+    l'ordre du tri: les lignes à clé NULL et les autres forment deux segments
+    consécutifs. Une condition par segment, sans OR, pour que chacune reste
+    une recherche dans l'index (clé de tri, id).
+    """
+    is_null, not_null = sort_column.is_(None), sort_column.is_not(None)
+    if not descending:
+        # NULL d'abord, puis les valeurs croissantes
+        if last_value is None:
+            return [and_(is_null, id_column > last_id), not_null]
+        return [tuple_(sort_column, id_column) > tuple_(literal(last_value), literal(last_id))]
+    # Valeurs décroissantes, puis NULL
+    if last_value is None:
+        return [and_(is_null, id_column < last_id)]
+    return [tuple_(sort_column, id_column) < tuple_(literal(last_value), literal(last_id)), is_null]
+
+
+async def keyset_page(db, query, sort_name, sort_column, id_column, descending, cursor, limit):
+    """
+    Exécute `query` (un select() SQLAlchemy) sur la session asynchrone `db`
+    et renvoie (lignes, next_cursor, total_estimate).
+
+    Le total est compté une seule fois, sur la première page, puis transporté
+    dans le curseur: c'est une estimation qui peut dériver si le catalogue
+    change pendant le parcours. Une page qui franchit la limite entre les
+    lignes à clé NULL et les autres coûte une requête de plus.
+    `limit` doit être positif (validé par les routes, voir MAX_PAGE_LIMIT).
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit doit être supérieur ou égal à 1")
+    query = query.order_by(None)
+
+    if cursor:
+        data = decode_cursor(cursor)
+        if data.get("sort") != sort_name:
+            raise HTTPException(status_code=400, detail="Curseur de pagination invalide pour ce tri")
+        last_value, last_id = data["key"]
+        total = data.get("total")
+        if (
+            last_id is None or not _matches_column(id_column, last_id)
+            or (last_value is not None and not _matches_column(sort_column, last_value))
+            or (total is not None and (isinstance(total, bool) or not isinstance(total, int)))
+        ):
+            raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+        segments = _remaining_segments(sort_column, id_column, descending, last_value, last_id)
+    else:
+        segments = [None]
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    rows = []
+    for condition in segments:
+        segment = query if condition is None else query.filter(condition)
+        result = await db.execute(
+            apply_sort(segment, sort_column, id_column, descending).limit(limit + 1 - len(rows))
+        )
+        rows.extend(result.scalars().all())
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({
+            "sort": sort_name,
+            "key": [getattr(last, sort_column.key), getattr(last, id_column.key)],
+            "total": total,
+        })
+
+    return rows, next_cursor, total
@@ -0,0 +1,95 @@
+# utils/response_cache.py
+"""
+Cache des réponses JSON des routes catalogue (/api/destinations, /api/packages).
+
+On garde les octets JSON déjà sérialisés: un succès de cache évite la requête
+SQL et toute la sérialisation Pydantic. La clé contient la version du catalogue,
+et le cache est vidé à chaque changement (voir utils/catalog_version.py).
+La mémoire est bornée en octets, avec éviction LRU.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from fastapi import Response
+
+from utils.catalog_version import get_catalog_version, on_catalog_change
+from utils.conditional import validator_headers
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+# Corps de la réponse, validateurs HTTP (ETag, Last-Modified) et, pour les
+# pages HTML, une variante gzip précompressée
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "last_modified", "gzip_body"], defaults=(None,))
+
+
+def _entry_size(entry) -> int:
+    return len(entry.body) + (len(entry.gzip_body) if entry.gzip_body else 0)
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body: bytes, etag: str = None, last_modified=None, gzip_body: bytes = None):
+        entry = CachedResponse(body, etag, last_modified, gzip_body)
+        if _entry_size(entry) > self.max_bytes:
+            return entry
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.size -= _entry_size(previous)
+            self._data[key] = entry
+            self.size += _entry_size(entry)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= _entry_size(evicted)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+on_catalog_change(lambda version: response_cache.clear())
+
+
+def _normalize(value):
+    # Les listes (continent=…&continent=…) ne dépendent pas de l'ordre
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted(str(v) for v in value))
+    return value
+
+
+def make_key(name: str, **params):
+    """
+    Clé (route, version du catalogue, paramètres normalisés); les paramètres
+    absents ou vides sont ignorés pour que ?search= et l'URL nue se partagent l'entrée.
+    """
+    normalized = tuple(sorted(
+        (k, _normalize(v)) for k, v in params.items() if v not in (None, "", [], ())
+    ))
+    return (name, get_catalog_version(), normalized)
+
+
+def json_response(body: bytes, etag: str = None, last_modified=None) -> Response:
+    headers = validator_headers(etag, last_modified) if etag else None
+    return Response(content=body, media_type="application/json", headers=headers)
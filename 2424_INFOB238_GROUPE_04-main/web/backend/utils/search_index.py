@@ -0,0 +1,123 @@
+# utils/search_index.py
+"""
+Index de recherche plein texte (SQLite FTS5) pour les destinations et les packages.
+
+Chaque table du catalogue possède une table virtuelle FTS5 « external content »
+(destinations_fts, packages_fts) dont le rowid est l'id de la ligne source.
+Des triggers SQLite maintiennent l'index à jour à chaque INSERT/UPDATE/DELETE,
+y compris pour les écritures qui ne passent pas par l'ORM.
+
+La correspondance n'est plus celle de l'ancien filtre ILIKE '%terme%':
+- chaque mot du terme est cherché en début de mot ("lag" trouve "lagon",
+  "agon" ne le trouve plus);
+- les accents et la casse sont ignorés ("musee" trouve "musée");
+- tous les mots sont requis, dans n'importe quel ordre (et non la phrase exacte).
+Mesures et exemples: scripts/bench_search.py.
+"""
+import re
+
+from sqlalchemy import column, or_, table, text
+
+# Colonnes indexées et poids BM25 associés (le nom compte plus que la description)
+SEARCH_FIELDS = {
+    "destinations": (("name", 10.0), ("country", 5.0), ("description", 1.0)),
+    "packages": (("name", 10.0), ("description", 1.0)),
+}
+
+# unicode61 + remove_diacritics: "Égypte" est trouvé avec "egypte"
+# prefix: index de préfixes pour que "par*" ne parcoure pas tout le vocabulaire
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+FTS_PREFIX = "2 3"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Renseigné par ensure_search_index, False tant que l'index n'est pas disponible
+_fts_enabled = False
+
+
+def _fts_name(tablename):
+    return f"{tablename}_fts"
+
+
+def _create_statements(tablename, fields):
+    fts = _fts_name(tablename)
+    cols = ", ".join(fields)
+    new_values = ", ".join(f"new.{f}" for f in fields)
+    old_values = ", ".join(f"old.{f}" for f in fields)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{tablename}', content_rowid='id', "
+        f"tokenize='{FTS_TOKENIZE}', prefix='{FTS_PREFIX}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tablename} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tablename} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tablename} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def ensure_search_index(engine):
+    """
+    Crée les tables FTS5 et leurs triggers si nécessaire, puis remplit l'index
+    à partir des données existantes lors de la première création.
+    Sans SQLite/FTS5, la recherche retombe sur le filtre ILIKE.
+    """
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    with engine.begin() as conn:
+        for tablename, weighted_fields in SEARCH_FIELDS.items():
+            fts = _fts_name(tablename)
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts},
+            ).first()
+            fields = [f for f, _ in weighted_fields]
+            for statement in _create_statements(tablename, fields):
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    _fts_enabled = True
+    return True
+
+
+def build_match_expression(term):
+    """
+    Transforme un terme libre en requête FTS5 sûre: chaque mot est cité
+    (pas d'opérateurs injectés) et recherché en préfixe, tous les mots requis.
+    """
+    tokens = _TOKEN_RE.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def apply_search(query, model, term):
+    """
+    Restreint une requête ORM sur Destination/Package aux lignes correspondant
+    à `term`, triées par pertinence BM25.
+    """
+    tablename = model.__tablename__
+    weighted_fields = SEARCH_FIELDS[tablename]
+
+    if not _fts_enabled:
+        pattern = f"%{term}%"
+        return query.filter(or_(*[getattr(model, f).ilike(pattern) for f, _ in weighted_fields]))
+
+    match = build_match_expression(term)
+    if match is None:
+        return query
+
+    fts = _fts_name(tablename)
+    fts_table = table(fts, column("rowid"))
+    weights = ", ".join(str(w) for _, w in weighted_fields)
+    return (
+        query.join(fts_table, fts_table.c.rowid == model.id)
+        .filter(text(f"{fts} MATCH :fts_match").bindparams(fts_match=match))
+        .order_by(text(f"bm25({fts}, {weights})"))
+    )
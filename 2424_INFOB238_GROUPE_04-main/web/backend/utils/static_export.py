@@ -0,0 +1,147 @@
+# utils/static_export.py
+"""
+Export statique du catalogue public (voir build_static.py) et mode de service.
+
+Le répertoire d'export contient un fichier par URL (index.html / index.json),
+ses variantes .gz et .br, et un manifest.json qui associe chaque chemin à son
+fichier et à l'empreinte de son contenu (utilisée comme ETag).
+
+Avec STATIC_EXPORT_DIR, l'application sert ces fichiers directement pour les
+GET/HEAD sans paramètres; les URLs filtrées ou de recherche (avec query string)
+et tout chemin absent du manifest restent rendus dynamiquement. Un proxy peut
+servir le même répertoire, à condition de laisser lui aussi passer vers
+l'application toute URL avec query string: try_files ignore $args et
+servirait /destinations?continent=Europe depuis la page non filtrée.
+Ex. avec nginx:
+
+    location / {
+        # Query string (filtres, recherche, curseur): toujours l'application
+        error_page 418 = @app;
+        if ($args) { return 418; }
+        gzip_static on; brotli_static on;
+        try_files $uri/index.html $uri/index.json @app;
+    }
+    location @app {
+        proxy_pass http://127.0.0.1:8000;
+    }
+
+L'export ne contient d'ailleurs aucune URL avec query string (build_static.py
+les refuse).
+
+L'export n'est chargé qu'une fois l'empreinte du catalogue calculée
+(load_static_export(), appelé par main.py après init_db()): s'il a été
+construit sur un autre état de la base que celui du démarrage, il n'est pas
+servi. Dès que le catalogue change dans le processus, l'export est considéré
+comme périmé et toutes les requêtes repassent par le rendu dynamique.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from fastapi import Request
+from starlette.responses import FileResponse, Response
+
+from utils.catalog_version import get_catalog_fingerprint, on_catalog_change
+from utils.conditional import is_not_modified
+from utils.page_cache import accepts_encoding
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel: seules les variantes gzip sont produites
+    brotli = None
+
+STATIC_EXPORT_DIR = os.getenv("STATIC_EXPORT_DIR")
+MANIFEST_NAME = "manifest.json"
+
+logger = logging.getLogger("travel_api")
+
+# (Content-Encoding, extension), par ordre de préférence
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:20]
+
+
+def output_file(path: str, media_type: str) -> str:
+    """
+    Fichier relatif d'une URL: /destination/1 -> destination/1/index.html,
+    /api/packages/ -> api/packages/index.json.
+    """
+    name = "index.json" if media_type.startswith("application/json") else "index.html"
+    directory = path.strip("/")
+    return f"{directory}/{name}" if directory else name
+
+
+class StaticExport:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.enabled = False
+        self.files = {}
+
+    def load(self):
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return self
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # Export construit sur un autre état du catalogue: ses pages seraient fausses
+        catalog = get_catalog_fingerprint()
+        if manifest.get("catalog") != catalog:
+            logger.warning(
+                "Export statique %s ignoré: construit pour le catalogue %s, base au démarrage %s",
+                self.directory, manifest.get("catalog"), catalog
+            )
+            return self
+        self.files = manifest["files"]
+        self.enabled = True
+        return self
+
+    def disable(self):
+        self.enabled = False
+
+    def response_for(self, request: Request):
+        """
+        Réponse servie depuis l'export, ou None pour passer au rendu dynamique.
+        """
+        if not self.enabled or request.method not in ("GET", "HEAD") or request.url.query:
+            return None
+        entry = self.files.get(request.url.path)
+        if entry is None:
+            return None
+
+        etag = f'"{entry["hash"]}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        file_path = os.path.join(self.directory, entry["file"])
+        # Requête partielle (Range): octets du contenu d'origine, jamais d'une variante compressée
+        encodings = entry["encodings"] if "range" not in request.headers else ()
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and accepts_encoding(request, encoding):
+                headers["Content-Encoding"] = encoding
+                file_path += suffix
+                break
+        return FileResponse(file_path, media_type=entry["media_type"], headers=headers)
+
+
+static_export = StaticExport(STATIC_EXPORT_DIR) if STATIC_EXPORT_DIR else None
+if static_export is not None:
+    on_catalog_change(lambda version: static_export.disable())
+
+
+def load_static_export():
+    """
+    Charge l'export, une fois l'empreinte du catalogue calculée (seed_catalog_version).
+    """
+    if static_export is not None:
+        static_export.load()
+
+
+async def static_export_middleware(request: Request, call_next):
+    response = static_export.response_for(request) if static_export is not None else None
+    if response is None:
+        response = await call_next(request)
+    return response
@@ -3,6 +3,9 @@ import re
 from typing import Optional
 from datetime import datetime
 
+# Plus grand entier accepté par SQLite et PostgreSQL (BIGINT)
+MAX_ID = 2 ** 63 - 1
+
 def validate_email(email: str) -> bool:
     """
     Valider le format d'un email.
@@ -127,4 +130,20 @@ def validate_price_category(category: str) -> bool:
     Valider qu'une catégorie de prix est valide.
     """
     valid_categories = ["Budget", "Moyen", "Luxe", "Premium"]
-    return category in valid_categories
\ No newline at end of file
+    return category in valid_categories
+
+def parse_id_list(value: str) -> Optional[list]:
+    """
+    Convertir une liste d'ids "1,2,3" en entiers, sans doublons et dans l'ordre.
+    Retourne None si un élément n'est pas un entier positif (chiffres ASCII, au plus MAX_ID).
+    """
+    ids = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        # Chiffres ASCII seulement: isdigit() accepte aussi "²", que int() refuse
+        if not (part.isascii() and part.isdigit()) or int(part) > MAX_ID:
+            return None
+        ids.append(int(part))
+    return list(dict.fromkeys(ids))